@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'cloudinary_storage',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'cloudinary',
     'django.contrib.sites',
     'allauth',
@@ -56,7 +57,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'reports.middleware.WhiteNoiseMiddleware',
+    'reports.middleware.TimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,10 +72,18 @@ ROOT_URLCONF = 'aviation_safety.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing each render for reports.metrics
+        'BACKEND': 'reports.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compile each template once per worker and reuse it; Django
+            # clears this cache on template changes when running runserver
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -97,6 +107,105 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# CACHE_BACKEND picks the backend for every alias: 'locmem' (per
+# process, the default), 'file' (shared by all workers on one host, stored
+# under CACHE_LOCATION), 'redis' (CACHE_LOCATION is the Redis URL) or
+# 'dummy' (caching disabled).
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_LOCATION = config('CACHE_LOCATION', default=str(BASE_DIR / '.cache'))
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_alias(name, max_entries):
+    """Settings for one named cache on the configured backend"""
+    alias = {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': name,
+        'KEY_PREFIX': name,
+        'OPTIONS': {},
+    }
+    if CACHE_BACKEND == 'file':
+        alias['LOCATION'] = os.path.join(CACHE_LOCATION, name)
+    elif CACHE_BACKEND == 'redis':
+        alias['LOCATION'] = CACHE_LOCATION
+    if CACHE_BACKEND in ('locmem', 'file'):
+        alias['OPTIONS']['MAX_ENTRIES'] = max_entries
+    return alias
+
+
+# 'default' is Django's own; 'fragments' holds rendered template
+# fragments; 'reports' holds query results, invalidated through
+# reports.cache when the models they come from change
+CACHES = {
+    'default': cache_alias('default', 1000),
+    'fragments': cache_alias(
+        'fragments',
+        config('FRAGMENT_CACHE_MAX_ENTRIES', default=5000, cast=int)
+    ),
+    'reports': cache_alias('reports', 1000),
+    'sessions': cache_alias(
+        'sessions',
+        config('SESSION_CACHE_MAX_ENTRIES', default=10000, cast=int)
+    ),
+}
+
+# Rendered board cards are keyed on report pk, updated_at, comment count
+# and author, so they never need explicit invalidation. Every fragment
+# key also includes a digest of the templates and FRAGMENT_CACHE_VERSION,
+# the release by default where Heroku's dyno metadata provides it, so a
+# deploy that renders cards differently starts with fresh entries
+FRAGMENT_CACHE_ALIAS = 'fragments'
+FRAGMENT_CACHE_TIMEOUT = config(
+    'FRAGMENT_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int
+)
+FRAGMENT_CACHE_VERSION = config(
+    'FRAGMENT_CACHE_VERSION',
+    default=config('HEROKU_RELEASE_VERSION', default='')
+)
+REPORTS_CACHE_ALIAS = 'reports'
+REPORTS_CACHE_TIMEOUT = config(
+    'REPORTS_CACHE_TIMEOUT', default=60 * 5, cast=int
+)
+
+
+# Request metrics (see reports.metrics): SERVER_TIMING adds a timing
+# breakdown header to every response; /metrics is open to staff users and
+# to scrapers sending "Authorization: Bearer <METRICS_TOKEN>" when set
+SERVER_TIMING = config('SERVER_TIMING', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+
+# SESSION_BACKEND picks where sessions live: 'db' (django_session, read on
+# every authenticated request), 'cached_db' (read through the 'sessions'
+# cache, written to both; needs a cache shared by all workers, i.e.
+# CACHE_BACKEND 'redis' or 'file', or a logout in one worker goes
+# unnoticed by the others) or 'signed_cookies' (nothing stored server
+# side; the signed session travels in the cookie).
+SESSION_BACKEND = config('SESSION_BACKEND', default='db')
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+SESSION_CACHE_ALIAS = 'sessions'
+
+# Flash messages live in their own cookie, so showing one never writes
+# the session (the default falls back to the session when it overflows)
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -151,8 +260,24 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Cloudinary configuration
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Report images are spooled to local disk and uploaded in the background
+# (see reports.images). IMAGE_UPLOADER is 'cloudinary' or 'local' (a
+# fake that copies into MEDIA_ROOT); with IMAGE_UPLOAD_WORKERS = 0 the
+# upload runs right after the report is committed instead of on a thread
+IMAGE_UPLOADER = config('IMAGE_UPLOADER', default='cloudinary')
+IMAGE_SPOOL_ROOT = config(
+    'IMAGE_SPOOL_ROOT', default=str(BASE_DIR / '.spool')
+)
+IMAGE_UPLOAD_WORKERS = config('IMAGE_UPLOAD_WORKERS', default=2, cast=int)
+
 # Django Allauth settings
+# The stock ModelBackend and allauth backend, but loading the user's
+# profile (and so their role) in the same query as the user. The stock
+# ones stay listed after them: sessions record the backend that logged
+# the user in, and those from before the switch must still resolve
 AUTHENTICATION_BACKENDS = [
+    'reports.backends.ProfileModelBackend',
+    'reports.backends.ProfileAuthenticationBackend',
     'django.contrib.auth.backends.ModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
 ]
@@ -167,6 +292,52 @@ ACCOUNT_EMAIL_VERIFICATION = 'none'
 ACCOUNT_LOGIN_METHODS = {'email'}
 ACCOUNT_SIGNUP_FIELDS = ['email*', 'password1*', 'password2*']
 
+# Board pagination: 'page' (numbered pages) or 'cursor' (keyset on
+# created_at/id, constant cost for deep pages)
+BOARD_PAGINATION = config('BOARD_PAGINATION', default='page')
+BOARD_APPROXIMATE_TOTAL = config(
+    'BOARD_APPROXIMATE_TOTAL', default=False, cast=bool
+)
+
+# Comments shown on a report page; earlier ones load on demand
+COMMENTS_PER_PAGE = config('COMMENTS_PER_PAGE', default=20, cast=int)
+
+# Report pages poll for comment changes every COMMENTS_POLL_SECONDS.
+# Deletions are remembered for COMMENT_DELETIONS_MAX_AGE seconds; a page
+# asking about changes older than that, or about more than
+# COMMENTS_PER_PAGE of them, is told to reload instead
+COMMENTS_POLL_SECONDS = config('COMMENTS_POLL_SECONDS', default=15, cast=int)
+COMMENT_DELETIONS_MAX_AGE = config(
+    'COMMENT_DELETIONS_MAX_AGE', default=86400, cast=int
+)
+
+# Investigations dashboard server-sent events: seconds between change
+# checks, seconds before a stream closes and the browser reconnects, and
+# the reconnect delay sent to the browser
+INVESTIGATION_STREAM_POLL = config(
+    'INVESTIGATION_STREAM_POLL', default=2, cast=float
+)
+INVESTIGATION_STREAM_MAX_AGE = config(
+    'INVESTIGATION_STREAM_MAX_AGE', default=300, cast=int
+)
+INVESTIGATION_STREAM_RETRY_MS = 5000
+
+# Reports read per query (plus one query for their comments) when
+# streaming an export
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Default number of rows per page in the JSON API (clients may ask for
+# up to 200 with ?limit=)
+API_PAGE_SIZE = config('API_PAGE_SIZE', default=50, cast=int)
+
+# Route the board, report detail and dashboard data to their async
+# views. asgi.py turns this on; WSGI servers and the tests keep the sync
+# views
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+# Most reports one batch status update may change
+STATUS_BATCH_MAX_IDS = config('STATUS_BATCH_MAX_IDS', default=1000, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
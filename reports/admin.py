@@ -1,9 +1,37 @@
-from django.contrib import admin
+from itertools import islice
+
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import SafetyReport, Comment, UserProfile
 
 
+def make_set_status_action(status, label):
+    """Admin action moving the selected reports to one status"""
+    def action(modeladmin, request, queryset):
+        # "Select all" can pick every report, so update them in batches
+        # no larger than the batch endpoint accepts
+        pks = queryset.values_list('pk', flat=True).iterator()
+        selected = updated = 0
+        while chunk := list(islice(pks, settings.STATUS_BATCH_MAX_IDS)):
+            results = SafetyReport.set_status_bulk(chunk, status)
+            selected += len(results)
+            updated += sum(
+                1 for result in results.values() if result == 'updated'
+            )
+        modeladmin.message_user(
+            request,
+            f'{updated} report(s) moved to "{label}", '
+            f'{selected - updated} already there.',
+            messages.SUCCESS
+        )
+    action.__name__ = f'set_status_{status}'
+    action.allowed_permissions = ('change',)
+    action.short_description = f'Set status to "{label}"'
+    return action
+
+
 @admin.register(SafetyReport)
 class SafetyReportAdmin(admin.ModelAdmin):
     list_display = [
@@ -14,6 +42,10 @@ class SafetyReportAdmin(admin.ModelAdmin):
     search_fields = ['place', 'description']
     date_hierarchy = 'date'
     readonly_fields = ['created_at', 'updated_at']
+    actions = [
+        make_set_status_action(status, label)
+        for status, label in SafetyReport.INVESTIGATION_STATUS_CHOICES
+    ]
 
     fieldsets = (
         ('Report Details', {
@@ -58,6 +90,7 @@ class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
     list_display = BaseUserAdmin.list_display + ('get_role',)
     list_filter = BaseUserAdmin.list_filter + ('profile__role',)
+    list_select_related = ('profile',)
 
     def get_role(self, obj):
         if hasattr(obj, 'profile'):
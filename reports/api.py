@@ -0,0 +1,90 @@
+"""
+Field selection and serialization for the read-only JSON API.
+
+Rows are fetched with ``values()`` and only the columns behind the
+requested ``?fields=`` are selected, so no model instances are built and
+skipped fields (a long description, the image) are never read from the
+database at all.
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import comment_count
+
+MAX_PAGE_SIZE = 200
+
+# API field name -> values() lookup
+REPORT_FIELDS = {
+    'id': 'id',
+    'place': 'place',
+    'date': 'date',
+    'time': 'time',
+    'description': 'description',
+    'image': 'image',
+    'investigation_status': 'investigation_status',
+    'author': 'author__username',
+    'comment_count': 'comment_count',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'report': 'report_id',
+    'author': 'author__username',
+    'content': 'content',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+
+def parse_fields(value, available):
+    """Requested field names from ?fields=, all of them if not given"""
+    if not value:
+        return list(available)
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def parse_since(value):
+    """Datetime from ?since=, read as the current timezone if naive"""
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError("since must be an ISO 8601 datetime")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def parse_limit(value, default):
+    """Page size from ?limit=, capped at MAX_PAGE_SIZE"""
+    if not value:
+        return default
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be a number")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def select_fields(queryset, fields, available):
+    """values() queryset for the fields, plus the columns cursors need"""
+    if 'comment_count' in fields:
+        queryset = queryset.annotate(comment_count=comment_count())
+    columns = {available[name] for name in fields} | {'id', 'created_at'}
+    return queryset.values(*columns)
+
+
+def serialize(rows, fields, available):
+    """Plain dicts for JsonResponse, keyed by API field name"""
+    results = []
+    for row in rows:
+        item = {name: row[available[name]] for name in fields}
+        if 'image' in item:
+            image = item['image']
+            item['image'] = getattr(image, 'url', image) or None
+        results.append(item)
+    return results
@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_save, post_delete
+        from .cache import invalidate_model
+        from .metrics import install_query_timer
+        from .models import SafetyReport, Comment, UserProfile
+
+        # Bump each model's cache namespace whenever its rows change
+        for model in (SafetyReport, Comment, UserProfile):
+            post_save.connect(invalidate_model, sender=model)
+            post_delete.connect(invalidate_model, sender=model)
+
+        # Time every query for the request metrics
+        connection_created.connect(install_query_timer)
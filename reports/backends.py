@@ -0,0 +1,41 @@
+"""
+Authentication backends that load the user's profile with the user.
+
+Django resolves ``request.user`` through the backend's ``get_user()`` on
+every request. Joining the profile into that query means the role checks
+in views and templates (``user.profile.is_investigator``) never cost a
+query of their own.
+"""
+from allauth.account.auth_backends import AuthenticationBackend
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class ProfileBackendMixin:
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.select_related(
+                'profile'
+            ).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        try:
+            user = await UserModel._default_manager.select_related(
+                'profile'
+            ).aget(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class ProfileModelBackend(ProfileBackendMixin, ModelBackend):
+    """ModelBackend that loads the profile with the user"""
+
+
+class ProfileAuthenticationBackend(ProfileBackendMixin, AuthenticationBackend):
+    """allauth's backend that loads the profile with the user"""
@@ -0,0 +1,207 @@
+"""
+Caching layer for the reports app.
+
+All cross-request caching in the app goes through this module:
+
+* Query results are stored in the ``settings.REPORTS_CACHE_ALIAS`` cache
+  under versioned namespaces, one per model (``safetyreport``,
+  ``comment``, ``userprofile``, ...). A key is built from the current
+  version of every namespace it depends on, so invalidating a namespace
+  is a single counter bump and stale entries are never read again.
+* Saves and deletes of the cached models bump their namespace through
+  the receivers connected in ``ReportsConfig.ready()``, and
+  ``namespace_invalidated`` is sent so other code can react.
+* Template fragments are stored in ``settings.FRAGMENT_CACHE_ALIAS``.
+  Their keys already include everything the fragment depends on (e.g. a
+  report's pk, ``updated_at`` and comment count), so they need no
+  invalidation at all. Every key also carries ``FRAGMENT_CACHE_VERSION``
+  and a digest of the templates, so a deploy never reads fragments
+  rendered by the previous release from a shared cache.
+
+Hit/miss counters are kept per process to help size the caches.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.dispatch import Signal
+
+# Sent with ``namespace`` after a namespace has been invalidated
+namespace_invalidated = Signal()
+
+_MISSING = object()
+_stats_lock = threading.Lock()
+_stats = Counter()
+
+
+def get_cache(alias=None):
+    return caches[alias or settings.REPORTS_CACHE_ALIAS]
+
+
+def fragment_cache():
+    return get_cache(settings.FRAGMENT_CACHE_ALIAS)
+
+
+def _version_key(namespace):
+    return f"ns:{namespace}"
+
+
+def namespace_versions(namespaces):
+    """Return {namespace: version}, starting unknown namespaces afresh"""
+    cache = get_cache()
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    versions = {}
+    for key, namespace in keys.items():
+        version = found.get(key)
+        if version is None:
+            # Seed from the clock so a namespace whose counter was evicted
+            # or cleared never reuses the version of an older entry
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        versions[namespace] = version
+    return versions
+
+
+def versioned_key(namespaces, key):
+    """Cache key for ``key`` under the current version of namespaces"""
+    if isinstance(namespaces, str):
+        namespaces = (namespaces,)
+    versions = namespace_versions(namespaces)
+    prefix = ':'.join(
+        f"{namespace}.{versions[namespace]}" for namespace in namespaces
+    )
+    return f"{prefix}:{key}"
+
+
+def invalidate(namespace):
+    """Drop everything cached under a namespace by bumping its version"""
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        namespace_versions((namespace,))
+    namespace_invalidated.send(sender=None, namespace=namespace)
+
+
+def invalidate_on_commit(namespace):
+    """
+    Invalidate now and again once the current transaction commits.
+
+    The first bump stops this transaction from reading its own stale
+    entries; the second discards anything another request cached from
+    the pre-commit state in between.
+    """
+    invalidate(namespace)
+    transaction.on_commit(lambda: invalidate(namespace))
+
+
+def cached(namespaces, key, compute, timeout=None, name=None):
+    """
+    Return the cached value for key, computing and storing it on a miss.
+
+    ``name`` is what the lookup is counted as in cache_stats(), the key
+    itself by default.
+    """
+    cache = get_cache()
+    full_key = versioned_key(namespaces, key)
+    value = cache.get(full_key, _MISSING)
+    record_lookup('queries', name or key, value is not _MISSING)
+    if value is _MISSING:
+        value = compute()
+        cache.set(
+            full_key,
+            value,
+            settings.REPORTS_CACHE_TIMEOUT if timeout is None else timeout
+        )
+    return value
+
+
+async def acached(namespaces, key, compute, timeout=None, name=None):
+    """cached() for async views; compute is a coroutine function"""
+    cache = get_cache()
+    full_key = await sync_to_async(versioned_key)(namespaces, key)
+    value = await cache.aget(full_key, _MISSING)
+    record_lookup('queries', name or key, value is not _MISSING)
+    if value is _MISSING:
+        value = await compute()
+        await cache.aset(
+            full_key,
+            value,
+            settings.REPORTS_CACHE_TIMEOUT if timeout is None else timeout
+        )
+    return value
+
+
+@lru_cache(maxsize=None)
+def templates_version():
+    """Digest of the project's template files, read once per process"""
+    digest = hashlib.md5(usedforsecurity=False)
+    for engine in settings.TEMPLATES:
+        for directory in map(Path, engine.get('DIRS', [])):
+            for path in sorted(directory.rglob('*')):
+                if path.is_file():
+                    digest.update(str(path.relative_to(directory)).encode())
+                    digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def fragment_key(name, vary_on):
+    return make_template_fragment_key(
+        name,
+        [settings.FRAGMENT_CACHE_VERSION, templates_version(), *vary_on]
+    )
+
+
+def invalidate_model(sender, **kwargs):
+    """post_save/post_delete receiver for models with a cache namespace"""
+    invalidate_on_commit(sender._meta.model_name)
+
+
+def record_lookup(kind, name, hit):
+    with _stats_lock:
+        _stats[(kind, name, 'hits' if hit else 'misses')] += 1
+
+
+def cache_stats():
+    """
+    Return per-process counters as
+    {kind: {name: {'hits': n, 'misses': n, 'hit_ratio': r}}}.
+    """
+    with _stats_lock:
+        snapshot = dict(_stats)
+    stats = {'fragments': {}, 'queries': {}}
+    for (kind, name, result), count in snapshot.items():
+        counts = stats.setdefault(kind, {}).setdefault(
+            name, {'hits': 0, 'misses': 0}
+        )
+        counts[result] = count
+    for names in stats.values():
+        for counts in names.values():
+            lookups = counts['hits'] + counts['misses']
+            counts['hit_ratio'] = round(counts['hits'] / lookups, 3)
+    return stats
+
+
+def fragment_stats():
+    return cache_stats()['fragments']
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def clear_caches():
+    """Empty the fragment and query caches and reset the counters"""
+    fragment_cache().clear()
+    get_cache().clear()
+    reset_stats()
@@ -0,0 +1,155 @@
+"""
+Validators for conditional GET on the read-only pages.
+
+Each function is cheap (one small query at most) and is used with
+``django.views.decorators.http.condition`` so a matching
+``If-None-Match`` / ``If-Modified-Since`` short-circuits to a 304 before
+the view runs its queries or renders a template. HTML pages vary by user
+(navbar, investigator controls, CSRF tokens), so their ETags include the
+user id and they do not send Last-Modified.
+"""
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import ContentVersion, InvestigationStatusCount
+
+
+def content_versions(request):
+    """ContentVersion.current(), fetched once per request"""
+    if not hasattr(request, '_content_versions'):
+        request._content_versions = ContentVersion.current()
+    return request._content_versions
+
+
+def status_last_modified(request, *args, **kwargs):
+    """When the investigation status counters last changed"""
+    if not hasattr(request, '_status_last_modified'):
+        request._status_last_modified = (
+            InvestigationStatusCount.objects.aggregate(
+                modified=Max('updated_at')
+            )['modified']
+        )
+    return request._status_last_modified
+
+
+def status_version(request):
+    """status_last_modified() as a string, '0' before any report exists"""
+    modified = status_last_modified(request)
+    return modified.isoformat() if modified else '0'
+
+
+def _version_tag(request, *names):
+    versions = content_versions(request)
+    return '-'.join(
+        str(versions.get(name, (0, None))[0]) for name in names
+    )
+
+
+def _user_tag(request):
+    """
+    The user part of an HTML page's ETag.
+
+    Pages render the CSRF token into their forms, and login rotates the
+    CSRF secret, so for a logged-in user the tag includes a hash of it.
+    Otherwise a page cached before logging out and in again would be
+    revalidated with its old token and its forms would fail with 403.
+    """
+    if not request.user.is_authenticated:
+        return 'u0'
+    secret = hashlib.md5(
+        request.META.get('CSRF_COOKIE', '').encode(), usedforsecurity=False
+    ).hexdigest()[:12]
+    return f"u{request.user.pk}-{secret}"
+
+
+def status_etag(request, *args, **kwargs):
+    modified = status_last_modified(request)
+    return f"status-{modified.timestamp() if modified else 0}"
+
+
+def investigations_etag(request, *args, **kwargs):
+    return f"{status_etag(request)}-{_user_tag(request)}"
+
+
+def _query_tag(request):
+    return hashlib.md5(
+        request.GET.urlencode().encode(), usedforsecurity=False
+    ).hexdigest()[:12]
+
+
+def board_etag(request, *args, **kwargs):
+    versions = _version_tag(request, 'reports', 'comments')
+    return f"board-{versions}-{_user_tag(request)}-{_query_tag(request)}"
+
+
+def api_etag(request, *args, **kwargs):
+    # JSON responses do not depend on the user
+    query = hashlib.md5(
+        request.get_full_path().encode(), usedforsecurity=False
+    ).hexdigest()[:12]
+    return f"api-{_version_tag(request, 'reports', 'comments')}-{query}"
+
+
+def report_detail_etag(request, pk, *args, **kwargs):
+    # Also used by the comment pages, which carry a cursor in the query
+    versions = _version_tag(request, 'reports', 'comments', 'profiles')
+    return (
+        f"report-{pk}-{versions}-{_user_tag(request)}-"
+        f"{_query_tag(request)}"
+    )
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """
+    ``condition`` for async views.
+
+    Django's decorator calls the validators directly, which the ORM
+    refuses inside an event loop, so here they run through
+    ``sync_to_async`` before the same conditional response logic.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            # Resolve the user once, without blocking the loop; the
+            # validators read request.user and views await auser()
+            request.user = await request.auser()
+            last_modified = None
+            if last_modified_func:
+                modified = await sync_to_async(last_modified_func)(
+                    request, *args, **kwargs
+                )
+                if modified:
+                    if not timezone.is_aware(modified):
+                        modified = timezone.make_aware(
+                            modified, datetime.timezone.utc
+                        )
+                    last_modified = int(modified.timestamp())
+            etag = None
+            if etag_func:
+                etag = quote_etag(await sync_to_async(etag_func)(
+                    request, *args, **kwargs
+                ))
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(
+                        last_modified
+                    )
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,150 @@
+"""
+Streaming exports of safety reports with their comment threads.
+
+Rows are produced by generators over chunked ``.iterator()`` reads, so a
+dump of any size holds one chunk of reports (and their comments) in
+memory at a time. Both formats write their first line before touching
+the database, which lets a streaming response start immediately.
+
+Under ASGI the generator is wrapped in ``astream()``: Django buffers a
+sync iterator whole before sending it from an async handler.
+
+* ``ndjson``: one JSON object per report, with a nested ``comments`` list.
+* ``csv``: one row per comment with the report columns repeated, or a
+  single row with empty comment columns for a report without comments.
+  ``import_reports`` reads the report columns and skips the repeats by
+  id, so an export imports as one report each; comments are not
+  imported.
+"""
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .models import Comment, SafetyReport
+from .search import filter_reports
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+REPORT_COLUMNS = [
+    'id', 'place', 'date', 'time', 'description', 'author_email',
+    'investigation_status', 'created_at', 'updated_at',
+]
+
+COMMENT_COLUMNS = [
+    'comment_id', 'comment_author_email', 'comment_content',
+    'comment_created_at', 'comment_updated_at',
+]
+
+
+def export_queryset(search=None, status=None):
+    """Reports matching the board filters, with authors and comments"""
+    reports = SafetyReport.objects.select_related('author').defer(
+        'search_vector', 'author__password'
+    ).prefetch_related(
+        Prefetch(
+            'comments',
+            queryset=Comment.objects.select_related('author').only(
+                'report_id', 'content', 'created_at', 'updated_at',
+                'author__email'
+            )
+        )
+    ).order_by('-created_at', '-pk')
+    return filter_reports(reports, search=search, status=status)
+
+
+def iter_records(queryset, chunk_size=None):
+    """Yield one dict per report, comments nested, a chunk at a time"""
+    for report in queryset.iterator(
+        chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE
+    ):
+        yield {
+            'id': report.pk,
+            'place': report.place,
+            'date': report.date.isoformat(),
+            'time': report.time.isoformat(),
+            'description': report.description,
+            'author_email': report.author.email,
+            'investigation_status': report.investigation_status,
+            'created_at': report.created_at.isoformat(),
+            'updated_at': report.updated_at.isoformat(),
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author_email': comment.author.email,
+                    'content': comment.content,
+                    'created_at': comment.created_at.isoformat(),
+                    'updated_at': comment.updated_at.isoformat(),
+                }
+                for comment in report.comments.all()
+            ],
+        }
+
+
+class _Echo:
+    """File-like object whose write() hands back what it was given"""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(records):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(REPORT_COLUMNS + COMMENT_COLUMNS)
+    for record in records:
+        report_values = [record[column] for column in REPORT_COLUMNS]
+        if not record['comments']:
+            yield writer.writerow(report_values + [''] * len(COMMENT_COLUMNS))
+        for comment in record['comments']:
+            yield writer.writerow(report_values + [
+                comment['id'],
+                comment['author_email'],
+                comment['content'],
+                comment['created_at'],
+                comment['updated_at'],
+            ])
+
+
+def render_ndjson(records):
+    # Nothing to send before the first row, so an empty line goes out at
+    # once; NDJSON readers skip blank lines
+    yield '\n'
+    for record in records:
+        yield json.dumps(record) + '\n'
+
+
+def render_export(file_format, search=None, status=None, chunk_size=None):
+    """Generator of text chunks for an export in the given format"""
+    records = iter_records(export_queryset(search, status), chunk_size)
+    if file_format == 'ndjson':
+        return render_ndjson(records)
+    return render_csv(records)
+
+
+async def astream(chunks, lines_per_step=100):
+    """
+    Async iterator over a sync export generator, for ASGI responses.
+
+    The generator reads the database, so it is advanced in the
+    request's sync thread, ``lines_per_step`` lines per hop to keep the
+    thread switches cheap. The first line goes out on its own so the
+    response still starts at once.
+    """
+    iterator = iter(chunks)
+
+    def step(size):
+        return ''.join(islice(iterator, size))
+
+    size = 1
+    while True:
+        text = await sync_to_async(step)(size)
+        if not text:
+            return
+        yield text
+        size = lines_per_step
@@ -0,0 +1,276 @@
+"""
+Background upload of report images.
+
+``create_report`` spools the uploaded file to ``IMAGE_SPOOL_ROOT`` and
+saves the report with ``pending_image`` set, so the request never waits
+on Cloudinary. Once the transaction commits, a small thread pool uploads
+the file with the configured uploader, stores the result in ``image``
+and deletes the spooled copy; until then pages show a "processing"
+placeholder. ``manage.py process_pending_images`` retries uploads left
+behind by an upstream failure or a crashed worker. The spool is local
+disk, so retries must run on the machine that spooled the file: on
+Heroku, a one-off dyno starts with an empty filesystem of its own.
+
+Pages never embed the original upload. ``DERIVATIVES`` names the sizes
+they show, each served as WebP with the original format as a fallback;
+Cloudinary builds them eagerly at upload time and keeps them on its CDN,
+and the markup for each stored image is built once per process.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from cloudinary import CloudinaryResource, uploader
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.html import format_html
+
+from .cache import invalidate_on_commit
+from .metrics import CLOUDINARY_SECONDS, timer
+from .models import ContentVersion, SafetyReport
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# Derivative name -> Cloudinary transformation
+DERIVATIVES = {
+    'thumbnail': {
+        'width': 320, 'height': 180, 'crop': 'fill', 'gravity': 'auto'
+    },
+    'medium': {'width': 800, 'crop': 'limit'},
+    'full': {'width': 1600, 'crop': 'limit'},
+}
+
+# Layout -> (derivatives offered in srcset, sizes, derivative for src)
+LAYOUTS = {
+    'card': (('thumbnail',), '320px', 'thumbnail'),
+    'detail': (
+        ('thumbnail', 'medium', 'full'),
+        '(min-width: 992px) 800px, 100vw',
+        'medium'
+    ),
+}
+
+# Served through a <source> so browsers without support get the original
+MODERN_FORMAT = 'webp'
+
+
+def eager_transformations():
+    """Every derivative in both formats, for Cloudinary to build on upload"""
+    transformations = []
+    for options in DERIVATIVES.values():
+        transformations.append(dict(options, quality='auto'))
+        transformations.append(
+            dict(options, quality='auto', format=MODERN_FORMAT)
+        )
+    return transformations
+
+
+def derivative_url(image, name, format=None):
+    """URL of one derivative of a stored image"""
+    options = dict(DERIVATIVES[name], quality='auto', secure=True)
+    if format:
+        options['format'] = format
+    return image.build_url(**options)
+
+
+def _srcset(image, names, format=None):
+    return ', '.join(
+        f"{derivative_url(image, name, format)} {DERIVATIVES[name]['width']}w"
+        for name in names
+    )
+
+
+@lru_cache(maxsize=2048)
+def _responsive_image(value, layout, alt, css_class):
+    image = SafetyReport._meta.get_field('image').parse_cloudinary_resource(
+        value
+    )
+    names, sizes, default = LAYOUTS[layout]
+    width = DERIVATIVES[default]['width']
+    height = DERIVATIVES[default].get('height')
+    return format_html(
+        '<picture>'
+        '<source type="image/{}" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" '
+        'width="{}"{} loading="lazy" decoding="async">'
+        '</picture>',
+        MODERN_FORMAT, _srcset(image, names, MODERN_FORMAT), sizes,
+        derivative_url(image, default), _srcset(image, names), sizes,
+        alt, css_class, width,
+        format_html(' height="{}"', height) if height else ''
+    )
+
+
+def responsive_image(image, layout, alt='', css_class=''):
+    """
+    <picture> markup for a stored image in one of the LAYOUTS.
+
+    The stored value carries the upload version, so a replaced image gets
+    new markup while unchanged ones are served from the in-process cache.
+    """
+    if not image:
+        return ''
+    return _responsive_image(image.get_prep_value(), layout, alt, css_class)
+
+
+class CloudinaryUploader:
+    """Uploads with the options declared on SafetyReport.image"""
+
+    def upload(self, file):
+        field = SafetyReport._meta.get_field('image')
+        options = {'type': field.type, 'resource_type': field.resource_type}
+        options.update(field.options)
+        # Build the derivatives now, off the request path, instead of on
+        # the first page view that asks for each of them
+        options.setdefault('eager', eager_transformations())
+        options.setdefault('eager_async', True)
+        with timer('cloudinary', CLOUDINARY_SECONDS):
+            return uploader.upload_resource(file, **options)
+
+
+class LocalUploader:
+    """
+    Stand-in for Cloudinary that copies images under MEDIA_ROOT.
+
+    Meant for tests and offline development: the stored value has the
+    same shape as a Cloudinary one, but its URL points nowhere.
+    """
+
+    def upload(self, file):
+        storage = FileSystemStorage(
+            location=os.path.join(settings.MEDIA_ROOT, 'report-images')
+        )
+        name = storage.save(os.path.basename(file.name), file)
+        public_id, extension = os.path.splitext(name)
+        return CloudinaryResource(
+            public_id=f"local/{public_id}",
+            format=extension.lstrip('.') or None,
+            version=1,
+            type='upload',
+            resource_type='image'
+        )
+
+
+UPLOADERS = {
+    'cloudinary': CloudinaryUploader,
+    'local': LocalUploader,
+}
+
+
+def get_uploader():
+    return UPLOADERS[settings.IMAGE_UPLOADER]()
+
+
+def spool_storage():
+    return FileSystemStorage(location=settings.IMAGE_SPOOL_ROOT)
+
+
+def spool_image(uploaded_file):
+    """Save an uploaded file to the spool and return its spool name"""
+    return spool_storage().save(
+        os.path.basename(uploaded_file.name), uploaded_file
+    )
+
+
+def upload_pending_image(pk, drop_missing=False):
+    """
+    Upload a report's spooled image and attach it to the report.
+
+    Returns True if the image was attached. Failures are logged and the
+    spooled file is kept so the upload can be retried. A missing spooled
+    file is only taken as lost, and the image dropped so the report stops
+    showing it as processing, with ``drop_missing``: from anywhere but
+    the machine that spooled it, every file looks missing.
+    """
+    name = SafetyReport.objects.filter(pk=pk).values_list(
+        'pending_image', flat=True
+    ).first()
+    if not name:
+        return False
+
+    storage = spool_storage()
+    try:
+        file = storage.open(name)
+    except FileNotFoundError:
+        if drop_missing:
+            logger.error(
+                "The spooled image %s of report %s is missing; dropping it",
+                name, pk
+            )
+            finish_pending_image(pk, name)
+        else:
+            logger.error(
+                "The spooled image %s of report %s is not in this "
+                "machine's spool", name, pk
+            )
+        return False
+    try:
+        with file:
+            resource = get_uploader().upload(file)
+    except Exception:
+        logger.exception("Uploading the image of report %s failed", pk)
+        return False
+
+    attached = finish_pending_image(pk, name, image=resource)
+    storage.delete(name)
+    return attached
+
+
+def finish_pending_image(pk, name, **changes):
+    """
+    Clear a report's pending image, applying any other changes with it.
+
+    Returns False if the report is gone or its pending image changed.
+    """
+    # A set-based UPDATE skips save() and its signals, so bump the
+    # content version and the report cache here
+    with transaction.atomic():
+        finished = SafetyReport.objects.filter(
+            pk=pk, pending_image=name
+        ).update(
+            pending_image=None,
+            updated_at=timezone.now(),
+            **changes
+        )
+        if finished:
+            ContentVersion.bump('reports')
+            invalidate_on_commit('safetyreport')
+    return bool(finished)
+
+
+def _upload_in_thread(pk):
+    try:
+        upload_pending_image(pk)
+    finally:
+        # Worker threads outlive requests, so nothing else closes these
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_UPLOAD_WORKERS,
+                thread_name_prefix='image-upload'
+            )
+        return _executor
+
+
+def schedule_upload(pk):
+    """Upload a report's spooled image after the transaction commits"""
+    def submit():
+        if settings.IMAGE_UPLOAD_WORKERS:
+            _get_executor().submit(_upload_in_thread, pk)
+        else:
+            upload_pending_image(pk)
+
+    transaction.on_commit(submit)
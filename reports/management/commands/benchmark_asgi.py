@@ -0,0 +1,191 @@
+import asyncio
+import importlib
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, reverse
+
+from reports.models import SafetyReport
+
+
+def reload_urlconf():
+    """Re-import the URLconf so it follows the ASYNC_VIEWS setting"""
+    from aviation_safety import urls as project_urls
+    from reports import urls as reports_urls
+    importlib.reload(reports_urls)
+    importlib.reload(project_urls)
+    clear_url_caches()
+
+
+def wsgi_request(handler, path):
+    path, _, query = path.partition('?')
+    environ = {'PATH_INFO': path, 'QUERY_STRING': query}
+    setup_testing_defaults(environ)
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(status)
+
+    started = time.perf_counter()
+    result = handler(environ, start_response)
+    try:
+        b''.join(result)
+    finally:
+        result.close()
+    return statuses[0].startswith('200'), time.perf_counter() - started
+
+
+async def asgi_request(handler, path):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'127.0.0.1')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('127.0.0.1', 80),
+    }
+    received = []
+    statuses = []
+
+    async def receive():
+        if not received:
+            received.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Never disconnect; Django stops listening once it has responded
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    started = time.perf_counter()
+    await handler(scope, receive, send)
+    return statuses[0] == 200, time.perf_counter() - started
+
+
+async def run_asgi(handler, paths, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def bounded(path):
+        async with limit:
+            return await asgi_request(handler, path)
+
+    return await asyncio.gather(*(bounded(path) for path in paths))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the board, report detail and dashboard data "
+        "views served through WSGI (sync views, one request per worker "
+        "thread) and ASGI (async views, one event loop). Uses the "
+        "configured database, which needs at least one report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help="Requests per view and server type."
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help="WSGI worker threads, like sync gunicorn workers."
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=32,
+            help="Requests in flight at once (ASGI)."
+        )
+        parser.add_argument(
+            '--query-delay', type=float, default=0.0,
+            help="Milliseconds added to every query, to stand in for a "
+                 "remote database."
+        )
+
+    def handle(self, *args, **options):
+        report = SafetyReport.objects.order_by('-created_at').first()
+        if report is None:
+            raise CommandError("No reports to benchmark; add some first.")
+        views = {
+            'board': reverse('board'),
+            'report_detail': reverse('report_detail', args=[report.pk]),
+            'data': reverse('get_investigation_data'),
+        }
+        delay = options['query_delay'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            # Sent on every reconnect of the same per-thread wrapper
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        if delay:
+            connection_created.connect(add_delay)
+        try:
+            results = {
+                'wsgi': self.run('wsgi', views, options),
+                'asgi': self.run('asgi', views, options),
+            }
+        finally:
+            connection_created.disconnect(add_delay)
+            reload_urlconf()
+
+        self.stdout.write(
+            f"{'view':<16}{'WSGI req/s':>12}{'ASGI req/s':>12}"
+            f"{'WSGI p95 ms':>13}{'ASGI p95 ms':>13}"
+        )
+        for name in views:
+            wsgi_rate, wsgi_p95 = results['wsgi'][name]
+            asgi_rate, asgi_p95 = results['asgi'][name]
+            self.stdout.write(
+                f"{name:<16}{wsgi_rate:>12.1f}{asgi_rate:>12.1f}"
+                f"{wsgi_p95:>13.1f}{asgi_p95:>13.1f}"
+            )
+
+    def run(self, mode, views, options):
+        """Return {view: (requests per second, p95 latency in ms)}"""
+        results = {}
+        with override_settings(ASYNC_VIEWS=(mode == 'asgi')):
+            reload_urlconf()
+            if mode == 'wsgi':
+                handler = WSGIHandler()
+            else:
+                handler = ASGIHandler()
+            for name, path in views.items():
+                paths = [path] * options['requests']
+                started = time.perf_counter()
+                if mode == 'wsgi':
+                    with ThreadPoolExecutor(options['workers']) as pool:
+                        outcomes = list(pool.map(
+                            lambda path: wsgi_request(handler, path), paths
+                        ))
+                else:
+                    outcomes = asyncio.run(
+                        run_asgi(handler, paths, options['concurrency'])
+                    )
+                elapsed = time.perf_counter() - started
+
+                failures = sum(1 for ok, _ in outcomes if not ok)
+                if failures:
+                    raise CommandError(
+                        f"{failures} {mode} requests to {path} failed"
+                    )
+                latencies = sorted(latency for _, latency in outcomes)
+                p95 = statistics.quantiles(latencies, n=20)[-1]
+                results[name] = (len(paths) / elapsed, p95 * 1000)
+        return results
@@ -0,0 +1,92 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from reports.cache import clear_caches
+from reports.models import SafetyReport
+
+
+def measure(client, path, requests):
+    """Return (queries per request, session queries per request, ms)"""
+    # Warm the template and query caches so every mode starts equal
+    client.get(path)
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(
+                    f"GET {path} returned {response.status_code}"
+                )
+        elapsed = time.perf_counter() - started
+    session_queries = sum(
+        1 for query in queries.captured_queries
+        if 'django_session' in query['sql']
+    )
+    return (
+        len(queries) / requests,
+        session_queries / requests,
+        elapsed / requests * 1000
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the session backends (SESSION_BACKEND) by the queries and "
+        "time per request of the board and report detail views for a "
+        "logged-in user. Uses the configured database, which needs at "
+        "least one user and one report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help="Requests per view and session backend."
+        )
+        parser.add_argument(
+            '--username',
+            help="User to log in as (default: the first active user)."
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.order_by('pk').first()
+        report = SafetyReport.objects.order_by('-created_at').first()
+        if user is None or report is None:
+            raise CommandError(
+                "Need a user and a report to benchmark; add some first."
+            )
+        views = {
+            'board': reverse('board'),
+            'report_detail': reverse('report_detail', args=[report.pk]),
+        }
+
+        self.stdout.write(
+            f"{'view':<16}{'backend':<16}{'queries':>9}"
+            f"{'session':>9}{'ms/req':>9}"
+        )
+        for name, path in views.items():
+            for backend, engine in settings.SESSION_ENGINES.items():
+                with override_settings(
+                    SESSION_ENGINE=engine,
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+                ):
+                    clear_caches()
+                    client = Client()
+                    client.force_login(user)
+                    queries, session, ms = measure(
+                        client, path, options['requests']
+                    )
+                    client.logout()
+                self.stdout.write(
+                    f"{name:<16}{backend:<16}{queries:>9.1f}"
+                    f"{session:>9.1f}{ms:>9.2f}"
+                )
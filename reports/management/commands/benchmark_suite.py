@@ -0,0 +1,239 @@
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from reports.cache import clear_caches
+from reports.models import Comment, SafetyReport, UserProfile
+from reports.seed import seed_dataset
+
+BENCHMARK_USER = 'benchmark'
+
+
+def percentile(latencies, p):
+    """p-th percentile of a sorted list, nearest rank"""
+    rank = round(p / 100 * len(latencies))
+    return latencies[max(0, min(len(latencies), rank) - 1)]
+
+
+def scenarios(rng, report_ids):
+    """name -> (method, function returning (path, data)) to benchmark"""
+    def report_detail():
+        return reverse('report_detail', args=[rng.choice(report_ids)]), None
+
+    def create_report():
+        return reverse('create_report'), {
+            'place': 'Benchmark Airport',
+            'date': '2025-01-15',
+            'time': '14:30',
+            'description': 'Benchmark report',
+        }
+
+    return {
+        'board': ('get', lambda: (reverse('board'), None)),
+        'board_search': (
+            'get', lambda: (reverse('board'), {'search': 'runway'})
+        ),
+        'report_detail': ('get', report_detail),
+        'investigations': ('get', lambda: (reverse('investigations'), None)),
+        'investigation_data': (
+            'get', lambda: (reverse('get_investigation_data'), None)
+        ),
+        'create_report': ('post', create_report),
+    }
+
+
+def run_scenario(client, method, target, requests, warmup):
+    """Return the latency and query figures of one scenario"""
+    for _ in range(warmup):
+        path, data = target()
+        getattr(client, method)(path, data)
+
+    latencies = []
+    queries = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        path, data = target()
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = getattr(client, method)(path, data)
+            latencies.append(time.perf_counter() - request_started)
+        if response.status_code not in (200, 302):
+            raise CommandError(
+                f"{method.upper()} {path} returned {response.status_code}"
+            )
+        queries += len(captured)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'requests_per_second': round(requests / elapsed, 1),
+        'queries_per_request': round(queries / requests, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the main views through the test client and write p50/"
+        "p95/p99 latency, throughput and queries per request as a JSON "
+        "baseline. Optionally seeds the configured database first; "
+        "create_report runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', action='store_true',
+            help="Add --users/--reports/--comments rows before running."
+        )
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--reports', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument(
+            '--random-seed', type=int, default=0,
+            help="Seed for the generated data and the visited reports."
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help="Timed requests per scenario."
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help="Untimed requests per scenario, to fill the caches."
+        )
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help="Only run this scenario (repeatable)."
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help="Write the results to this JSON file."
+        )
+        parser.add_argument(
+            '--baseline',
+            help="Earlier results to compare against."
+        )
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            started = time.perf_counter()
+            seed_dataset(
+                options['users'], options['reports'], options['comments'],
+                seed=options['random_seed']
+            )
+            self.stdout.write(
+                f"Seeded in {time.perf_counter() - started:.1f}s"
+            )
+
+        rng = random.Random(options['random_seed'])
+        report_ids = list(
+            SafetyReport.objects.order_by('-created_at').values_list(
+                'pk', flat=True
+            )[:1000]
+        )
+        if not report_ids:
+            raise CommandError("No reports to benchmark; use --seed.")
+        available = scenarios(rng, report_ids)
+        names = options['scenarios'] or list(available)
+        unknown = set(names) - set(available)
+        if unknown:
+            raise CommandError(
+                f"Unknown scenarios: {', '.join(sorted(unknown))}. "
+                f"Choose from {', '.join(available)}."
+            )
+
+        # Logged in with force_login, so it never needs a password
+        user, created = User.objects.get_or_create(username=BENCHMARK_USER)
+        if created:
+            user.set_unusable_password()
+            user.save()
+        UserProfile.objects.filter(user=user).update(role='investigator')
+
+        results = {}
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            clear_caches()
+            client = Client()
+            client.force_login(user)
+            self.stdout.write(
+                f"{'scenario':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+                f"{'req/s':>9}{'queries':>9}"
+            )
+            for name in names:
+                method, target = available[name]
+                if method == 'get':
+                    results[name] = run_scenario(
+                        client, method, target,
+                        options['requests'], options['warmup']
+                    )
+                else:
+                    # Roll writes back so every run sees the same data
+                    with transaction.atomic():
+                        results[name] = run_scenario(
+                            client, method, target,
+                            options['requests'], options['warmup']
+                        )
+                        transaction.set_rollback(True)
+                self.stdout.write(
+                    f"{name:<20}{results[name]['p50_ms']:>9.2f}"
+                    f"{results[name]['p95_ms']:>9.2f}"
+                    f"{results[name]['p99_ms']:>9.2f}"
+                    f"{results[name]['requests_per_second']:>9.1f}"
+                    f"{results[name]['queries_per_request']:>9.2f}"
+                )
+
+        report = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'users': User.objects.count(),
+                'reports': SafetyReport.objects.count(),
+                'comments': Comment.objects.count(),
+                'requests': options['requests'],
+                'random_seed': options['random_seed'],
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+                output.write('\n')
+        if options['baseline']:
+            self.compare(options['baseline'], results)
+
+    def compare(self, path, results):
+        """Print the change of each figure against an earlier run"""
+        try:
+            with open(path, encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)['scenarios']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read baseline {path}: {e}")
+        for name, figures in results.items():
+            if name not in baseline:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request'):
+                before = baseline[name].get(key)
+                if before:
+                    changes.append(
+                        f"{key} {(figures[key] - before) / before:+.0%}"
+                    )
+            self.stdout.write(f"{name:<20}{', '.join(changes)}")
@@ -0,0 +1,158 @@
+import time
+import tracemalloc
+from datetime import date, datetime, time as dt_time, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Engine, RequestContext
+from django.template.backends.django import get_installed_libraries
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+
+from reports.forms import CommentForm, SafetyReportForm
+from reports.models import Comment, SafetyReport
+
+PAGES = {
+    'about': ('reports/about.html', '/about/'),
+    'board': ('reports/board.html', '/board/'),
+    'report_detail': ('reports/report_detail.html', '/report/1/'),
+    'investigations': ('reports/investigations.html', '/investigations/'),
+    'create_report': ('reports/create_report.html', '/create/'),
+}
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def sample_context():
+    """Unsaved objects shaped like what the views pass to templates"""
+    author = User(pk=1, username='pilot', email='pilot@example.com')
+    created = datetime(2025, 1, 15, 14, 30, tzinfo=timezone.utc)
+    reports = []
+    for i in range(6):
+        report = SafetyReport(
+            pk=i + 1,
+            author=author,
+            place=f'Airport {i}',
+            date=date(2025, 1, 15),
+            time=dt_time(14, 30),
+            description='Runway incursion during taxi. ' * 20,
+            created_at=created,
+            updated_at=created,
+        )
+        report.comment_count = i
+        reports.append(report)
+    comments = [
+        Comment(
+            pk=i + 1,
+            report=reports[0],
+            author=author,
+            content='Observed from the tower. ' * 5,
+            created_at=created,
+            updated_at=created,
+        )
+        for i in range(20)
+    ]
+    status_data = {
+        'waiting': 10, 'investigating': 5, 'closed': 3, 'dismissed': 2,
+    }
+    return {
+        'page_obj': Paginator(reports, 6).get_page(1),
+        'search_query': '',
+        'report': reports[0],
+        'comments': comments,
+        'comment_form': CommentForm(),
+        'form': SafetyReportForm(),
+        'is_new_user': False,
+        'status_data': status_data,
+        'status_percentages': {
+            status: count * 5.0 for status, count in status_data.items()
+        },
+        'total_reports': 20,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure render time and peak memory per page with uncached and "
+        "cached template loaders."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument(
+            '--page', action='append', choices=sorted(PAGES),
+            help="Only benchmark these pages (repeatable)."
+        )
+
+    def build_engine(self, cached):
+        options = settings.TEMPLATES[0]['OPTIONS']
+        loaders = [('django.template.loaders.cached.Loader', LOADERS)]
+        return Engine(
+            dirs=settings.TEMPLATES[0]['DIRS'],
+            loaders=loaders if cached else LOADERS,
+            context_processors=options['context_processors'],
+            builtins=options.get('builtins', []),
+            libraries={
+                **get_installed_libraries(),
+                **options.get('libraries', {}),
+            },
+        )
+
+    def measure(self, engine, template_name, request, context, iterations):
+        def render():
+            engine.get_template(template_name).render(
+                RequestContext(request, context)
+            )
+
+        # Warm up so the cached loader has compiled the template
+        render()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        elapsed = time.perf_counter() - started
+
+        # Memory is traced separately since tracing skews the timings
+        tracemalloc.start()
+        render()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed / iterations * 1000, peak / 1024
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        pages = options['page'] or sorted(PAGES)
+        factory = RequestFactory()
+        context = sample_context()
+        dummy = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+        self.stdout.write(
+            f"{'page':<16}{'uncached ms':>13}{'cached ms':>12}"
+            f"{'uncached KiB':>14}{'cached KiB':>12}"
+        )
+        # Disable the fragment cache so every card is actually rendered
+        with override_settings(CACHES={
+            alias: dummy for alias in settings.CACHES
+        }):
+            for page in pages:
+                template_name, path = PAGES[page]
+                request = factory.get(path)
+                request.user = AnonymousUser()
+                request.resolver_match = resolve(path)
+                results = [
+                    self.measure(
+                        self.build_engine(cached), template_name, request,
+                        context, iterations
+                    )
+                    for cached in (False, True)
+                ]
+                (slow_ms, slow_kib), (fast_ms, fast_kib) = results
+                self.stdout.write(
+                    f"{page:<16}{slow_ms:>13.3f}{fast_ms:>12.3f}"
+                    f"{slow_kib:>14.1f}{fast_kib:>12.1f}"
+                )
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.export import FORMATS, render_export
+from reports.models import SafetyReport
+
+
+class Command(BaseCommand):
+    help = (
+        "Export safety reports with their comments as CSV or NDJSON, "
+        "optionally filtered like the board. Output is streamed, so memory "
+        "use does not grow with the number of reports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=sorted(FORMATS), default='csv',
+            help="Output format (default: csv)."
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help="File to write to (default: standard output)."
+        )
+        parser.add_argument('--search', help="Board search query.")
+        parser.add_argument(
+            '--status',
+            choices=[
+                status
+                for status, _ in SafetyReport.INVESTIGATION_STATUS_CHOICES
+            ],
+            help="Only export reports with this investigation status."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE,
+            help="Reports read per query."
+        )
+
+    def handle(self, *args, **options):
+        chunks = render_export(
+            options['format'],
+            search=options['search'],
+            status=options['status'],
+            chunk_size=options['chunk_size']
+        )
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        try:
+            output = open(
+                options['output'], 'w', newline='', encoding='utf-8'
+            )
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['output']}: {e}")
+        with output:
+            output.writelines(chunks)
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.seed import SEED_PASSWORD, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate realistic users, reports and comments with bulk inserts. "
+        "Reports are spread over places, dates and statuses, and comment "
+        "threads are long-tailed. The same --random-seed on an empty "
+        "database generates the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--reports', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument(
+            '--days', type=int, default=3 * 365,
+            help="Spread the reports over this many days up to now."
+        )
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Rows per INSERT and per transaction."
+        )
+
+    def handle(self, *args, **options):
+        for name in ('users', 'reports', 'comments'):
+            if options[name] < 0:
+                raise CommandError(f"--{name} cannot be negative.")
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--days and --batch-size must be positive.")
+
+        started = last = time.perf_counter()
+
+        def progress(kind, count):
+            nonlocal last
+            now = time.perf_counter()
+            if count:
+                self.stdout.write(
+                    f"{count} {kind} in {now - last:.1f}s "
+                    f"({count / (now - last):,.0f} rows/s)"
+                )
+            last = now
+
+        try:
+            seed_dataset(
+                options['users'], options['reports'], options['comments'],
+                seed=options['random_seed'],
+                batch_size=options['batch_size'],
+                days=options['days'],
+                progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.perf_counter() - started:.1f}s. Generated users "
+            f"log in with the password '{SEED_PASSWORD}'."
+        ))
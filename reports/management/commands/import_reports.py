@@ -0,0 +1,243 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from reports.cache import invalidate_on_commit
+from reports.forms import SafetyReportForm
+from reports.models import (
+    ContentVersion,
+    InvestigationStatusCount,
+    SafetyReport,
+)
+
+VALID_STATUSES = {
+    status for status, _ in SafetyReport.INVESTIGATION_STATUS_CHOICES
+}
+
+
+COLUMNS = [*SafetyReportForm.base_fields, 'author_email',
+           'investigation_status']
+
+
+def text(row, column):
+    """
+    A column as stripped text. CSV rows short of columns hold None for
+    them, and JSON values may be null or numbers.
+    """
+    return str(row.get(column) or '').strip()
+
+
+def non_text_column(row):
+    """The first column holding a JSON list, object or boolean, if any"""
+    for column in COLUMNS:
+        value = row.get(column)
+        if isinstance(value, bool) or not isinstance(
+            value, (str, int, float, type(None))
+        ):
+            return column
+    return None
+
+
+def read_csv(stream):
+    for line_number, row in enumerate(csv.DictReader(stream), start=2):
+        yield line_number, row
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, e
+            continue
+        if not isinstance(row, dict):
+            row = ValueError("expected a JSON object")
+        yield line_number, row
+
+
+class Command(BaseCommand):
+    help = (
+        "Import historical safety reports from CSV or JSON Lines. Rows need "
+        "place, date, time, description and author_email, and may set "
+        "investigation_status. A row repeating the id of the row before it "
+        "is skipped, so a CSV from export_reports, which repeats a report "
+        "on each of its comment rows, imports each report once. Input is "
+        "streamed and written in batches, so memory use does not grow with "
+        "the file size."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help="File to import, or '-' to read standard input."
+        )
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help="Input format (default: guessed from the file extension)."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Rows per bulk insert and transaction (default: 1000)."
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Validate every row without writing anything."
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if not file_format:
+            file_format = 'jsonl' if path.endswith(
+                ('.jsonl', '.ndjson')
+            ) else 'csv'
+        reader = read_jsonl if file_format == 'jsonl' else read_csv
+
+        self.batch_size = options['batch_size']
+        self.dry_run = options['dry_run']
+        self.author_ids = {}
+        self.imported = 0
+        self.errors = 0
+        self.skipped = 0
+        self.last_id = None
+        self.started = time.monotonic()
+
+        if path == '-':
+            self.import_rows(reader(sys.stdin))
+        else:
+            try:
+                stream = open(path, newline='', encoding='utf-8')
+            except OSError as e:
+                raise CommandError(f"Cannot open {path}: {e}")
+            with stream:
+                self.import_rows(reader(stream))
+
+        verb = "Validated" if self.dry_run else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {self.imported} reports, {self.errors} rows rejected, "
+            f"{self.skipped} repeated rows skipped, "
+            f"in {time.monotonic() - self.started:.1f}s."
+        ))
+
+    def import_rows(self, rows):
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            elapsed = time.monotonic() - self.started
+            self.stdout.write(
+                f"{self.imported + self.errors + self.skipped} rows read, "
+                f"{self.imported} imported, {self.errors} rejected "
+                f"({self.imported / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+
+    def resolve_authors(self, batch):
+        """Look up author ids for emails not seen in earlier batches"""
+        emails = {
+            text(row, 'author_email').lower()
+            for _, row in batch
+            if isinstance(row, dict)
+        }
+        missing = emails - set(self.author_ids) - {''}
+        if missing:
+            for user_id, email in User.objects.annotate(
+                email_lower=Lower('email')
+            ).filter(email_lower__in=missing).values_list(
+                'id', 'email_lower'
+            ):
+                self.author_ids[email] = user_id
+            for email in missing - set(self.author_ids):
+                self.author_ids[email] = None
+
+    def reject(self, line_number, message):
+        self.errors += 1
+        self.stderr.write(f"line {line_number}: {message}")
+
+    def build_report(self, line_number, row):
+        """Validate a row and return an unsaved SafetyReport, or None"""
+        if isinstance(row, Exception):
+            self.reject(line_number, f"invalid row: {row}")
+            return None
+
+        # Only compared with the previous row, as exports write a report's
+        # rows together, so memory use stays flat
+        report_id = text(row, 'id')
+        if report_id and report_id == self.last_id:
+            self.skipped += 1
+            return None
+        self.last_id = report_id
+
+        column = non_text_column(row)
+        if column:
+            self.reject(
+                line_number,
+                f"{column}: expected text, got {json.dumps(row[column])}"
+            )
+            return None
+
+        form = SafetyReportForm(data={
+            column: text(row, column)
+            for column in SafetyReportForm.base_fields
+        })
+        if not form.is_valid():
+            messages = '; '.join(
+                f"{field}: {' '.join(errors)}"
+                for field, errors in form.errors.items()
+            )
+            self.reject(line_number, messages)
+            return None
+
+        email = text(row, 'author_email').lower()
+        author_id = self.author_ids.get(email)
+        if author_id is None:
+            self.reject(line_number, f"author_email: no user '{email}'")
+            return None
+
+        status = text(row, 'investigation_status') or 'waiting'
+        if status not in VALID_STATUSES:
+            self.reject(
+                line_number, f"investigation_status: invalid '{status}'"
+            )
+            return None
+
+        report = form.save(commit=False)
+        report.author_id = author_id
+        report.investigation_status = status
+        return report
+
+    def import_batch(self, batch):
+        self.resolve_authors(batch)
+        reports = [
+            report for report in (
+                self.build_report(line_number, row)
+                for line_number, row in batch
+            )
+            if report is not None
+        ]
+        if not reports or self.dry_run:
+            self.imported += len(reports)
+            return
+
+        deltas = {}
+        for report in reports:
+            deltas[report.investigation_status] = (
+                deltas.get(report.investigation_status, 0) + 1
+            )
+
+        # bulk_create skips save() and signals, so keep the counters,
+        # ETag versions and caches in step by hand in the same transaction
+        with transaction.atomic():
+            SafetyReport.objects.bulk_create(reports)
+            InvestigationStatusCount.adjust(deltas)
+            ContentVersion.bump('reports')
+            invalidate_on_commit('safetyreport')
+        self.imported += len(reports)
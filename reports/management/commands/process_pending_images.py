@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reports.images import upload_pending_image
+from reports.models import SafetyReport
+
+
+class Command(BaseCommand):
+    help = (
+        "Upload report images still waiting in the local spool, e.g. after "
+        "a failed upload. Run it where the spool lives: a one-off dyno has "
+        "an empty filesystem and sees none of the web dyno's files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=300,
+            help="Skip reports saved less than this many seconds ago, "
+                 "which the web process may still be uploading "
+                 "(default: 300)."
+        )
+        parser.add_argument(
+            '--drop-missing', action='store_true',
+            help="Clear the pending image of reports whose spooled file "
+                 "is missing, e.g. after the spool was wiped. Only safe "
+                 "on the machine that spooled the files."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        pks = list(SafetyReport.objects.filter(
+            pending_image__isnull=False, updated_at__lte=cutoff
+        ).values_list('pk', flat=True))
+
+        failed = 0
+        for pk in pks:
+            if upload_pending_image(pk, options['drop_missing']):
+                self.stdout.write(f"report {pk}: uploaded")
+            else:
+                failed += 1
+                self.stderr.write(f"report {pk}: upload failed")
+
+        if failed:
+            raise CommandError(
+                f"{failed} of {len(pks)} pending images failed to upload."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Uploaded {len(pks)} pending images."
+        ))
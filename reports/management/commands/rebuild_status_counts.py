@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.models import InvestigationStatusCount
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the investigation status counters from the reports table, "
+        "or verify them with --check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Only compare the counters with the reports table and "
+                 "exit with an error if they differ."
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stored = InvestigationStatusCount.current()
+            actual = InvestigationStatusCount.actual()
+            mismatches = [
+                f"{status}: stored {stored[status]}, actual {count}"
+                for status, count in actual.items()
+                if stored[status] != count
+            ]
+            if mismatches:
+                raise CommandError(
+                    "Status counters are out of date:\n" +
+                    "\n".join(mismatches)
+                )
+            self.stdout.write(self.style.SUCCESS("Status counters match."))
+            return
+
+        counts = InvestigationStatusCount.rebuild()
+        for status, count in counts.items():
+            self.stdout.write(f"{status}: {count}")
+        self.stdout.write(self.style.SUCCESS("Status counters rebuilt."))
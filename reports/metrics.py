@@ -0,0 +1,260 @@
+"""
+Request timing and per-process metrics.
+
+``TimingMiddleware`` opens a ``RequestTimings`` collector for every
+request. Database queries (an execute wrapper installed on each new
+connection), top-level template renders (``TimedDjangoTemplates``) and
+Cloudinary calls (``timer('cloudinary')``) add their time to it, and the
+middleware reports the totals in a ``Server-Timing`` header and feeds
+them into the histograms behind ``/metrics``.
+
+The collector lives in a context variable, so work that asgiref moves to
+another thread for the request is still counted. Like the cache
+counters, the histograms are per worker process; Prometheus scrapes each
+worker through its own target, or sums whichever one answered.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .cache import cache_stats
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Time and call count per kind of work, for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.counts = {}
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Value for the Server-Timing header, durations in milliseconds"""
+        entries = [f'total;dur={total * 1000:.1f}']
+        for name, seconds in self.durations.items():
+            entries.append(
+                f'{name};dur={seconds * 1000:.1f};'
+                f'desc="count={self.counts[name]}"'
+            )
+        return ', '.join(entries)
+
+
+def start_request():
+    """Start collecting timings for the current request"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def record(name, seconds):
+    """Add time spent in one call to the current request, if any"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timer(name, histogram=None):
+    """
+    Time the enclosed block as one call of kind ``name``, also observing
+    it in ``histogram`` (without labels) when given.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        record(name, elapsed)
+        if histogram is not None:
+            histogram.observe((), elapsed)
+
+
+def time_query(execute, sql, params, many, context):
+    """Connection execute wrapper adding each query to the request"""
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    with timer('db'):
+        return execute(sql, params, many, context)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created is sent again when a thread reconnects
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timer('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing every top-level render.
+
+    Includes and extended templates render inside their parent, so they
+    are not counted twice. Queries run lazily by a template are included
+    in its time as well as in ``db``.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(
+            super().get_template(template_name).template, self
+        )
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with a fixed set of label names"""
+
+    def __init__(self, name, help, labelnames, buckets):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label values -> [count per bucket..., count, sum]
+        self._series = {}
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [
+                    0, 0.0
+                ]
+            for position in range(index, len(self.buckets)):
+                series[position] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        lines = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            series = {labels: list(s) for labels, s in self._series.items()}
+        for labels, values in sorted(series.items()):
+            pairs = list(zip(self.labelnames, labels))
+            bounds = [*self.buckets, '+Inf']
+            for bound, count in zip(bounds, [*values[:-2], values[-2]]):
+                lines.append(
+                    f'{self.name}_bucket{format_labels(pairs, le=bound)} '
+                    f'{count}'
+                )
+            lines.append(
+                f'{self.name}_count{format_labels(pairs)} {values[-2]}'
+            )
+            lines.append(f'{self.name}_sum{format_labels(pairs)} {values[-1]}')
+        return lines
+
+
+def format_labels(pairs, **extra):
+    """{name="value",...} for a series, empty when it has no labels"""
+    pairs = [*pairs, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (
+        str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+            '\n', r'\n'
+        )
+        for _, value in pairs
+    )
+    return '{' + ','.join(
+        f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)
+    ) + '}'
+
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Time from the request reaching the middleware to its response.',
+    ('view', 'method', 'status'), SECONDS_BUCKETS
+)
+DB_SECONDS = Histogram(
+    'http_request_db_seconds',
+    'Time spent in database queries per request.',
+    ('view',), SECONDS_BUCKETS
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries per request.',
+    ('view',), QUERY_BUCKETS
+)
+TEMPLATE_SECONDS = Histogram(
+    'http_request_template_seconds',
+    'Time spent rendering templates per request.',
+    ('view',), SECONDS_BUCKETS
+)
+CLOUDINARY_SECONDS = Histogram(
+    'cloudinary_call_seconds',
+    'Duration of calls to the Cloudinary API, including background uploads.',
+    (), SECONDS_BUCKETS
+)
+HISTOGRAMS = [
+    REQUEST_SECONDS, DB_SECONDS, DB_QUERIES, TEMPLATE_SECONDS,
+    CLOUDINARY_SECONDS,
+]
+
+
+def observe_request(timings, total, view, method, status):
+    """Feed one finished request into the histograms"""
+    REQUEST_SECONDS.observe((view, method, str(status)), total)
+    DB_SECONDS.observe((view,), timings.durations.get('db', 0.0))
+    DB_QUERIES.observe((view,), timings.counts.get('db', 0))
+    if 'template' in timings.durations:
+        TEMPLATE_SECONDS.observe((view,), timings.durations['template'])
+
+
+def reset_metrics():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
+
+
+def render_metrics():
+    """All metrics of this process in the Prometheus text format"""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+
+    lines.append(
+        '# HELP cache_lookups_total Fragment and query cache lookups.'
+    )
+    lines.append('# TYPE cache_lookups_total counter')
+    for kind, names in sorted(cache_stats().items()):
+        for name, counts in sorted(names.items()):
+            for result in ('hits', 'misses'):
+                labels = format_labels(
+                    [('kind', kind), ('name', name), ('result', result)]
+                )
+                lines.append(f'cache_lookups_total{labels} {counts[result]}')
+    return '\n'.join(lines) + '\n'
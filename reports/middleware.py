@@ -0,0 +1,90 @@
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings as django_settings
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoise
+
+from . import metrics
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoise):
+    """
+    WhiteNoise that can also run in async mode.
+
+    The stock middleware is sync-only, and a single sync middleware makes
+    Django run the rest of the chain, async views included, inside a
+    worker thread under ASGI. Static lookups are a dict read here, and
+    only serving a matched file goes to a thread.
+    """
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response=None, settings=django_settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class TimingMiddleware:
+    """
+    Time each request and break the time down in a Server-Timing header.
+
+    Reports the total, database (with the query count), template and
+    Cloudinary time of the request, and records them in the per-view
+    histograms served at /metrics. Works in sync and async mode without
+    switching the chain between the two.
+    """
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = timings.total()
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.observe_request(
+            timings, total, view, request.method, response.status_code
+        )
+        if django_settings.SERVER_TIMING:
+            response.headers['Server-Timing'] = timings.server_timing(total)
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:07
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from reports.search import install_search_backend, remove_search_backend
+
+
+def install(apps, schema_editor):
+    install_search_backend(schema_editor)
+
+
+def remove(apps, schema_editor):
+    remove_search_backend(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_safetyreport_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='safetyreport',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install, remove),
+    ]
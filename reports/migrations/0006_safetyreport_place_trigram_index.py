@@ -0,0 +1,29 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from reports.search import (
+    install_place_trigram_index,
+    remove_place_trigram_index,
+)
+
+
+def install(apps, schema_editor):
+    install_place_trigram_index(schema_editor)
+
+
+def remove(apps, schema_editor):
+    remove_place_trigram_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('reports', '0005_safetyreport_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(install, remove),
+    ]
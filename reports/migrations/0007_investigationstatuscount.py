@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:11
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counts(apps, schema_editor):
+    SafetyReport = apps.get_model('reports', 'SafetyReport')
+    InvestigationStatusCount = apps.get_model(
+        'reports', 'InvestigationStatusCount'
+    )
+    counts = {
+        status: 0
+        for status in ('waiting', 'investigating', 'closed', 'dismissed')
+    }
+    stats = SafetyReport.objects.values('investigation_status').annotate(
+        count=Count('pk')
+    ).order_by()
+    for stat in stats:
+        counts[stat['investigation_status']] = stat['count']
+    InvestigationStatusCount.objects.bulk_create([
+        InvestigationStatusCount(status=status, count=count)
+        for status, count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_safetyreport_place_trigram_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvestigationStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting investigation'), ('investigating', 'Under investigation'), ('closed', 'Investigation closed'), ('dismissed', 'Dismissed')], max_length=20, unique=True)),
+                ('count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['status'],
+            },
+        ),
+        migrations.RunPython(populate_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:14
+
+from django.db import migrations, models
+
+
+def create_versions(apps, schema_editor):
+    ContentVersion = apps.get_model('reports', 'ContentVersion')
+    ContentVersion.objects.bulk_create([
+        ContentVersion(name=name)
+        for name in ('reports', 'comments', 'profiles')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_investigationstatuscount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=30, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0008_contentversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='safetyreport',
+            name='pending_image',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True),
+        ),
+    ]
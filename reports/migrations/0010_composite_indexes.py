@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from reports.search import install_search_backend
+
+
+def reinstall_sqlite_search(apps, schema_editor):
+    # SQLite rebuilds reports_safetyreport to drop the author index, which
+    # also drops the full-text search triggers attached to it
+    if schema_editor.connection.vendor == 'sqlite':
+        install_search_backend(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0009_safetyreport_pending_image'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Runs last when unapplying, after the table is rebuilt again
+        migrations.RunPython(
+            migrations.RunPython.noop, reinstall_sqlite_search
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='report',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='reports.safetyreport'),
+        ),
+        migrations.AlterField(
+            model_name='safetyreport',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='safety_reports', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['report', 'created_at'], name='comment_report_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safetyreport',
+            index=models.Index(fields=['created_at', 'id'], name='report_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safetyreport',
+            index=models.Index(fields=['investigation_status', 'created_at', 'id'], name='report_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='safetyreport',
+            index=models.Index(fields=['author', 'created_at'], name='report_author_created_idx'),
+        ),
+        migrations.RunPython(
+            reinstall_sqlite_search, migrations.RunPython.noop
+        ),
+    ]
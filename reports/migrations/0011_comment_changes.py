@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_composite_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['report', 'updated_at'], name='comment_report_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='commentdeletion',
+            name='report',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='reports.safetyreport'),
+        ),
+        migrations.AddIndex(
+            model_name='commentdeletion',
+            index=models.Index(fields=['report', 'deleted_at'], name='deletion_report_deleted_idx'),
+        ),
+    ]
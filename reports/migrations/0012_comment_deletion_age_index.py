@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0011_comment_changes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commentdeletion',
+            index=models.Index(fields=['deleted_at'], name='deletion_deleted_idx'),
+        ),
+    ]
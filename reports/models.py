@@ -1,9 +1,19 @@
-from django.db import models
+import weakref
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.urls import reverse
-from django.db.models.signals import post_save
+from django.utils import timezone
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
+from .cache import invalidate_on_commit
 
 
 class UserProfile(models.Model):
@@ -30,6 +40,21 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.get_role_display()}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'role' in field_names:
+            instance._saved_role = instance.role
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_role = self.role
+
+    def has_changed(self):
+        """True if the role differs from what was loaded or last saved"""
+        return self.role != getattr(self, '_saved_role', None)
+
     def is_investigator(self):
         return self.role in ['investigator', 'admin']
 
@@ -44,11 +69,17 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
-    else:
+def save_user_profile(sender, instance, created, **kwargs):
+    # Users are saved on every login (last_login), so only touch a profile
+    # that was loaded with the user and edited since; checking for one
+    # that was never loaded would cost a query per save
+    if created or not User.profile.related.is_cached(instance):
+        return
+    profile = User.profile.related.get_cached_value(instance)
+    if profile is None:
         UserProfile.objects.create(user=instance)
+    elif profile.has_changed():
+        profile.save()
 
 
 class SafetyReport(models.Model):
@@ -59,10 +90,12 @@ class SafetyReport(models.Model):
         ('dismissed', 'Dismissed'),
     ]
 
+    # Indexed by report_author_created_idx, which starts with author
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='safety_reports'
+        related_name='safety_reports',
+        db_index=False
     )
     place = models.CharField(max_length=200)
     date = models.DateField()
@@ -74,6 +107,13 @@ class SafetyReport(models.Model):
         null=True,
         help_text="Optional image attachment for the safety report"
     )
+    # Spooled upload waiting for the background worker, see reports.images
+    pending_image = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        editable=False
+    )
     investigation_status = models.CharField(
         max_length=20,
         choices=INVESTIGATION_STATUS_CHOICES,
@@ -82,13 +122,96 @@ class SafetyReport(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL, see reports.search
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        # Access paths of the board (newest first, optionally by status,
+        # with the keyset paginator's pk tie-break) and of per-author
+        # lookups
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'],
+                name='report_created_idx'
+            ),
+            models.Index(
+                fields=['investigation_status', 'created_at', 'id'],
+                name='report_status_created_idx'
+            ),
+            models.Index(
+                fields=['author', 'created_at'],
+                name='report_author_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Safety Report - {self.place} on {self.date}"
 
+    def save(self, *args, **kwargs):
+        # Keep the dashboard status counters in step with this row, in the
+        # same transaction as the write itself
+        with transaction.atomic():
+            previous_status = None
+            if not self._state.adding:
+                previous_status = SafetyReport.objects.select_for_update(
+                ).filter(pk=self.pk).values_list(
+                    'investigation_status', flat=True
+                ).first()
+            super().save(*args, **kwargs)
+            if previous_status != self.investigation_status:
+                deltas = {self.investigation_status: 1}
+                if previous_status is not None:
+                    deltas[previous_status] = -1
+                InvestigationStatusCount.adjust(deltas)
+
+    @classmethod
+    def set_status_bulk(cls, pks, status):
+        """
+        Move many reports to one status with a single UPDATE.
+
+        Returns {pk: 'updated' | 'unchanged' | 'not_found'}. The UPDATE
+        skips save() and its signals, so the status counters, content
+        version and cache are maintained here, in the same transaction.
+        """
+        pks = list(dict.fromkeys(pks))
+        with transaction.atomic():
+            previous = dict(
+                cls.objects.select_for_update().filter(
+                    pk__in=pks
+                ).values_list('pk', 'investigation_status')
+            )
+            changed = [
+                pk for pk, old_status in previous.items()
+                if old_status != status
+            ]
+            if changed:
+                cls.objects.filter(pk__in=changed).update(
+                    investigation_status=status,
+                    updated_at=timezone.now()
+                )
+                deltas = {status: len(changed)}
+                for pk in changed:
+                    deltas[previous[pk]] = deltas.get(previous[pk], 0) - 1
+                InvestigationStatusCount.adjust(deltas)
+                ContentVersion.bump('reports')
+                invalidate_on_commit('safetyreport')
+
+        changed = set(changed)
+        return {
+            pk: (
+                'not_found' if pk not in previous
+                else 'updated' if pk in changed
+                else 'unchanged'
+            )
+            for pk in pks
+        }
+
+    @property
+    def image_pending(self):
+        """True while an attached image is still being uploaded"""
+        return bool(self.pending_image)
+
     def get_absolute_url(self):
         return reverse('report_detail', kwargs={'pk': self.pk})
 
@@ -114,10 +237,12 @@ class SafetyReport(models.Model):
 
 
 class Comment(models.Model):
+    # Indexed by comment_report_created_idx, which starts with report
     report = models.ForeignKey(
         SafetyReport,
         on_delete=models.CASCADE,
-        related_name='comments'
+        related_name='comments',
+        db_index=False
     )
     author = models.ForeignKey(
         User,
@@ -130,6 +255,331 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        # A report's comments in display order, and those changed since
+        # a given time (updated_at is set on creation too)
+        indexes = [
+            models.Index(
+                fields=['report', 'created_at'],
+                name='comment_report_created_idx'
+            ),
+            models.Index(
+                fields=['report', 'updated_at'],
+                name='comment_report_updated_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.email} on {self.report.place}"
+
+
+def comment_count():
+    """
+    Number of comments of each report, for annotate().
+
+    A correlated subquery rather than Count('comments'): aggregating over
+    a join needs a GROUP BY, which makes the database read and sort every
+    matching report before it can apply LIMIT, while this keeps paged
+    queries walking the created_at indexes.
+    """
+    counts = Comment.objects.filter(
+        report=OuterRef('pk')
+    ).order_by().values('report').annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts), 0)
+
+
+class DeleteBatch:
+    """
+    Rows removed by one delete() call, cascades included.
+
+    Django sends every pre_delete of a deletion before the first
+    post_delete, each with the object or queryset that started it as
+    ``origin``. Gathering the rows from the pre_delete signals lets the
+    post_delete work run once per deletion, set-based, instead of once
+    per row.
+    """
+    _batches = {}
+
+    def __init__(self, origin):
+        self.origin = weakref.ref(origin)
+        self.reports = set()
+        self.statuses = Counter()
+        self.comments = []
+        self.done = set()
+
+    @classmethod
+    def of(cls, origin, starting=False):
+        """
+        The batch of origin's current deletion. ``starting`` (from a
+        pre_delete) begins a new one if the last deletion of the same
+        origin already finished.
+        """
+        batch = cls._batches.get(id(origin))
+        if batch is None or batch.origin() is not origin or (
+            starting and batch.done
+        ):
+            batch = cls._batches[id(origin)] = cls(origin)
+            weakref.finalize(origin, cls._batches.pop, id(origin), None)
+        return batch
+
+    def once(self, task):
+        """True the first time task is asked for in this deletion"""
+        if task in self.done:
+            return False
+        self.done.add(task)
+        return True
+
+
+class CommentDeletion(models.Model):
+    """
+    Tombstone of a deleted comment.
+
+    Lets pages that poll a report's thread for changes remove comments
+    deleted since they last asked. Comments deleted along with their
+    report get none, and tombstones older than COMMENT_DELETIONS_MAX_AGE
+    are pruned as new ones are recorded.
+    """
+    # Indexed by deletion_report_deleted_idx, which starts with report.
+    # No constraint, so tombstones of a since deleted report are simply
+    # left to be pruned
+    report = models.ForeignKey(
+        SafetyReport,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+'
+    )
+    comment_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['report', 'deleted_at'],
+                name='deletion_report_deleted_idx'
+            ),
+            models.Index(fields=['deleted_at'], name='deletion_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Comment {self.comment_id} deleted {self.deleted_at}"
+
+    @classmethod
+    def record(cls, deletions):
+        """Tombstones for [(report_id, comment_id)], in one INSERT"""
+        if not deletions:
+            return
+        now = timezone.now()
+        cls.objects.filter(
+            deleted_at__lt=now - timedelta(
+                seconds=settings.COMMENT_DELETIONS_MAX_AGE
+            )
+        ).delete()
+        cls.objects.bulk_create(
+            cls(report_id=report_id, comment_id=comment_id, deleted_at=now)
+            for report_id, comment_id in deletions
+        )
+
+
+@receiver(pre_delete, sender=UserProfile)
+def note_profile_deletion(sender, instance, origin=None, **kwargs):
+    if origin is not None:
+        DeleteBatch.of(origin, starting=True)
+
+
+@receiver(pre_delete, sender=SafetyReport)
+def note_report_deletion(sender, instance, origin=None, **kwargs):
+    if origin is not None:
+        batch = DeleteBatch.of(origin, starting=True)
+        batch.reports.add(instance.pk)
+        batch.statuses[instance.investigation_status] += 1
+
+
+@receiver(pre_delete, sender=Comment)
+def note_comment_deletion(sender, instance, origin=None, **kwargs):
+    if origin is not None:
+        DeleteBatch.of(origin, starting=True).comments.append(
+            (instance.report_id, instance.pk)
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def record_comment_deletion(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        CommentDeletion.record([(instance.report_id, instance.pk)])
+        return
+    batch = DeleteBatch.of(origin)
+    if batch.once('tombstones'):
+        # A report's page goes with it, so its comments need none
+        CommentDeletion.record([
+            (report_id, comment_id)
+            for report_id, comment_id in batch.comments
+            if report_id not in batch.reports
+        ])
+
+
+class InvestigationStatusCount(models.Model):
+    """
+    Denormalized number of reports per investigation status.
+
+    Maintained by SafetyReport.save() and the post_delete signal below so
+    the investigations dashboard reads a handful of rows instead of
+    aggregating the whole reports table. Rebuild or verify it with
+    ``manage.py rebuild_status_counts``.
+    """
+    status = models.CharField(
+        max_length=20,
+        choices=SafetyReport.INVESTIGATION_STATUS_CHOICES,
+        unique=True
+    )
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['status']
+
+    def __str__(self):
+        return f"{self.get_status_display()}: {self.count}"
+
+    @classmethod
+    def adjust(cls, deltas):
+        """Apply {status: delta} changes with set-based UPDATEs"""
+        now = timezone.now()
+        for status, delta in deltas.items():
+            if not delta:
+                continue
+            updated = cls.objects.filter(status=status).update(
+                count=F('count') + delta,
+                updated_at=now
+            )
+            if not updated:
+                cls.objects.get_or_create(status=status)
+                cls.objects.filter(status=status).update(
+                    count=F('count') + delta,
+                    updated_at=now
+                )
+        invalidate_on_commit('investigationstatuscount')
+
+    @classmethod
+    def current(cls):
+        """Return {status: count} for every status, in one query"""
+        counts = {
+            status: 0
+            for status, _ in SafetyReport.INVESTIGATION_STATUS_CHOICES
+        }
+        for status, count in cls.objects.values_list('status', 'count'):
+            counts[status] = count
+        return counts
+
+    @classmethod
+    async def acurrent(cls):
+        """current() for async callers"""
+        counts = {
+            status: 0
+            for status, _ in SafetyReport.INVESTIGATION_STATUS_CHOICES
+        }
+        async for status, count in cls.objects.values_list(
+            'status', 'count'
+        ):
+            counts[status] = count
+        return counts
+
+    @classmethod
+    def actual(cls):
+        """Return {status: count} aggregated from the reports table"""
+        counts = {
+            status: 0
+            for status, _ in SafetyReport.INVESTIGATION_STATUS_CHOICES
+        }
+        stats = SafetyReport.objects.values(
+            'investigation_status'
+        ).annotate(
+            count=Count('pk')
+        ).order_by()
+        for stat in stats:
+            counts[stat['investigation_status']] = stat['count']
+        return counts
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every counter from the reports table"""
+        with transaction.atomic():
+            # Lock the counters so concurrent writers wait for the rebuild
+            list(cls.objects.select_for_update())
+            counts = cls.actual()
+            now = timezone.now()
+            for status, count in counts.items():
+                cls.objects.update_or_create(
+                    status=status,
+                    defaults={'count': count, 'updated_at': now}
+                )
+        invalidate_on_commit('investigationstatuscount')
+        return counts
+
+
+@receiver(post_delete, sender=SafetyReport)
+def update_status_count_on_delete(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        InvestigationStatusCount.adjust({instance.investigation_status: -1})
+        return
+    batch = DeleteBatch.of(origin)
+    if batch.once('statuses'):
+        # One UPDATE per status, in the deletion's own transaction
+        InvestigationStatusCount.adjust({
+            status: -count for status, count in batch.statuses.items()
+        })
+
+
+class ContentVersion(models.Model):
+    """
+    Change counter per kind of content shown on the public pages.
+
+    Bumped on every save or delete of reports, comments and profiles so
+    views can build cheap validators (ETags) without scanning the tables
+    they render.
+    """
+    name = models.CharField(max_length=30, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+    @classmethod
+    def bump(cls, name):
+        """Increment the counter for one kind of content"""
+        updated = cls.objects.filter(name=name).update(
+            version=F('version') + 1,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            cls.objects.get_or_create(name=name, defaults={'version': 1})
+
+    @classmethod
+    def current(cls):
+        """Return {name: (version, updated_at)} for all counters"""
+        return {
+            name: (version, updated_at)
+            for name, version, updated_at in cls.objects.values_list(
+                'name', 'version', 'updated_at'
+            )
+        }
+
+
+CONTENT_VERSION_NAMES = {
+    SafetyReport: 'reports',
+    Comment: 'comments',
+    UserProfile: 'profiles',
+}
+
+
+@receiver(post_save, sender=SafetyReport)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=SafetyReport)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=UserProfile)
+def bump_content_version(sender, origin=None, **kwargs):
+    name = CONTENT_VERSION_NAMES[sender]
+    # Once per deletion, however many rows it cascades to
+    if origin is None or DeleteBatch.of(origin).once(f'bump:{name}'):
+        ContentVersion.bump(name)
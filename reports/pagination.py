@@ -0,0 +1,197 @@
+"""
+Keyset (cursor) pagination for report listings.
+
+Pages are addressed by the ``(created_at, id)`` of the first or last row
+shown instead of an offset, so fetching page N costs the same as page 1
+and no ``COUNT(*)`` is needed.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Q
+
+
+def encode_cursor(row):
+    """Build an opaque cursor token from a row's sort key"""
+    if isinstance(row, dict):
+        # A values() row, as served by the JSON API
+        created_at, pk = row['created_at'], row['id']
+    else:
+        created_at, pk = row.created_at, row.pk
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (created_at, pk) for a cursor token, or None if invalid"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def approximate_count(queryset):
+    """
+    Cheap row estimate for a queryset.
+
+    On PostgreSQL this reads the planner's estimate instead of scanning
+    the table; other backends fall back to an exact count.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    if not queryset.query.where:
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [table]
+            )
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+
+    sql, params = queryset.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPage:
+    """A page of results addressed by cursors rather than page numbers"""
+
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 approximate_total=None):
+        self.object_list = object_list
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+        self.approximate_total = approximate_total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if self.has_next_page and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous_page and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset newest-first on ``(created_at, id)``.
+
+    This matches ``SafetyReport.Meta.ordering`` with ``id`` as a
+    tie-breaker so rows sharing a timestamp are never skipped. Any other
+    ordering of the queryset, such as a search rank, is replaced.
+    """
+
+    def __init__(self, queryset, per_page, with_total=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.with_total = with_total
+
+    def _rows_query(self, after_key, before_key):
+        """Queryset for up to one page plus one row in the asked direction"""
+        if before_key:
+            created_at, pk = before_key
+            return self.queryset.filter(
+                Q(created_at__gt=created_at) |
+                Q(created_at=created_at, pk__gt=pk)
+            ).order_by('created_at', 'pk')[:self.per_page + 1]
+
+        queryset = self.queryset.order_by('-created_at', '-pk')
+        if after_key:
+            created_at, pk = after_key
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, pk__lt=pk)
+            )
+        return queryset[:self.per_page + 1]
+
+    def _build_page(self, rows, after_key, before_key, total):
+        if before_key:
+            object_list = rows[:self.per_page][::-1]
+            has_next = True
+            has_previous = True
+        else:
+            has_next = len(rows) > self.per_page
+            object_list = rows[:self.per_page]
+            has_previous = after_key is not None
+        return KeysetPage(object_list, has_next, has_previous, total)
+
+    def get_page(self, after=None, before=None):
+        after_key = decode_cursor(after)
+        before_key = decode_cursor(before)
+
+        rows = list(self._rows_query(after_key, before_key))
+        if before_key and len(rows) <= self.per_page:
+            # Walked back to the newest rows: serve a full first page
+            return self.get_page()
+
+        total = None
+        if self.with_total:
+            total = approximate_count(self.queryset)
+        return self._build_page(rows, after_key, before_key, total)
+
+    async def aget_page(self, after=None, before=None):
+        """get_page() for async views, using the async ORM"""
+        after_key = decode_cursor(after)
+        before_key = decode_cursor(before)
+
+        rows = [row async for row in self._rows_query(after_key, before_key)]
+        if before_key and len(rows) <= self.per_page:
+            return await self.aget_page()
+
+        total = None
+        if self.with_total:
+            total = await sync_to_async(approximate_count)(self.queryset)
+        return self._build_page(rows, after_key, before_key, total)
+
+
+async def aget_page(paginator, number):
+    """
+    Paginator.get_page() for async views.
+
+    The count and the page's rows are fetched through the async ORM, so
+    rendering the page afterwards runs no queries.
+    """
+    paginator.count = await paginator.object_list.acount()
+    page = paginator.get_page(number)
+    page.object_list = [row async for row in page.object_list]
+    return page
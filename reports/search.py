@@ -0,0 +1,222 @@
+"""
+Full-text search over safety reports.
+
+On PostgreSQL a trigger keeps the weighted ``search_vector`` column
+current and queries are served from its GIN index, ranked with
+``ts_rank``. Place names are also matched fuzzily through a trigram
+index, so "Heathrw" or "EGL" still find their reports. SQLite (tests
+and local development) uses an FTS5 table kept in sync by triggers and
+ranked with bm25. Any other backend falls back to substring matching.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Q
+
+FTS_TABLE = 'reports_safetyreport_fts'
+
+POSTGRES_INSTALL_SQL = [
+    """
+    CREATE OR REPLACE FUNCTION reports_safetyreport_search_vector_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.place, '')), 'A') ||
+            setweight(
+                to_tsvector('english', coalesce(NEW.description, '')), 'B'
+            );
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER reports_safetyreport_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF place, description
+    ON reports_safetyreport
+    FOR EACH ROW EXECUTE FUNCTION reports_safetyreport_search_vector_update()
+    """,
+    """
+    UPDATE reports_safetyreport SET search_vector =
+        setweight(to_tsvector('simple', coalesce(place, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS reports_safetyreport_search_vector_gin
+    ON reports_safetyreport USING gin (search_vector)
+    """,
+]
+
+POSTGRES_REMOVE_SQL = [
+    "DROP INDEX IF EXISTS reports_safetyreport_search_vector_gin",
+    "DROP TRIGGER IF EXISTS reports_safetyreport_search_vector_trigger "
+    "ON reports_safetyreport",
+    "DROP FUNCTION IF EXISTS reports_safetyreport_search_vector_update()",
+]
+
+SQLITE_INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        place, description,
+        content='reports_safetyreport', content_rowid='id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON reports_safetyreport BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, place, description)
+        VALUES (new.id, new.place, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON reports_safetyreport BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, place, description)
+        VALUES ('delete', old.id, old.place, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF place, description ON reports_safetyreport BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, place, description)
+        VALUES ('delete', old.id, old.place, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, place, description)
+        VALUES (new.id, new.place, new.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVE_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+PLACE_TRIGRAM_INDEX_SQL = """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS reports_safetyreport_place_trgm
+    ON reports_safetyreport USING gin (place gin_trgm_ops)
+"""
+
+PLACE_TRIGRAM_INDEX_REMOVE_SQL = (
+    "DROP INDEX CONCURRENTLY IF EXISTS reports_safetyreport_place_trgm"
+)
+
+
+def install_search_backend(schema_editor):
+    """
+    Create the search triggers and indexes for the current database.
+
+    Safe to run again, e.g. after SQLite rebuilds ``reports_safetyreport``
+    during a migration and drops the triggers attached to it.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_INSTALL_SQL
+        schema_editor.execute(
+            "DROP TRIGGER IF EXISTS "
+            "reports_safetyreport_search_vector_trigger "
+            "ON reports_safetyreport"
+        )
+    elif vendor == 'sqlite':
+        statements = SQLITE_INSTALL_SQL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def remove_search_backend(schema_editor):
+    """Drop whatever install_search_backend created"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_REMOVE_SQL
+    elif vendor == 'sqlite':
+        statements = SQLITE_REMOVE_SQL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def install_place_trigram_index(schema_editor):
+    """
+    Build the trigram index on ``place`` without locking the table.
+
+    Needs the pg_trgm extension and must run outside a transaction. Other
+    backends have no trigram support and are skipped.
+    """
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(PLACE_TRIGRAM_INDEX_SQL)
+
+
+def remove_place_trigram_index(schema_editor):
+    """Drop the trigram index on ``place``"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(PLACE_TRIGRAM_INDEX_REMOVE_SQL)
+
+
+def fts5_query(text):
+    """Turn free text into a safe FTS5 prefix query, e.g. '"egl"* "5"*'"""
+    terms = re.findall(r'\w+', text)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_reports(queryset, text):
+    """
+    Filter a SafetyReport queryset by a search box query.
+
+    Matches are annotated with ``search_rank`` (higher is more relevant)
+    and ordered by relevance, then newest first.
+    """
+    if connection.vendor == 'postgresql':
+        query = (
+            SearchQuery(text, config='simple', search_type='websearch') |
+            SearchQuery(text, config='english', search_type='websearch')
+        )
+        return queryset.filter(
+            Q(search_vector=query) |
+            Q(place__trigram_word_similar=text)
+        ).annotate(
+            search_rank=(
+                SearchRank(F('search_vector'), query) +
+                TrigramWordSimilarity(text, 'place')
+            )
+        ).order_by('-search_rank', '-created_at')
+
+    if connection.vendor == 'sqlite':
+        match = fts5_query(text)
+        if not match:
+            return queryset.none()
+        # Join the FTS table so one MATCH yields both the matching rows
+        # and their rank; a rank subquery would rerun the MATCH per row.
+        # The ORM has no join to an unrelated table short of extra()
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f"{FTS_TABLE}.rowid = reports_safetyreport.id",
+                f"{FTS_TABLE} MATCH %s",
+            ],
+            params=[match],
+            select={'search_rank': f"-{FTS_TABLE}.rank"},
+        ).order_by('-search_rank', '-created_at')
+
+    return queryset.filter(
+        Q(place__icontains=text) |
+        Q(description__icontains=text)
+    )
+
+
+def filter_reports(queryset, search=None, status=None):
+    """Apply the board's search box and status filters to a queryset"""
+    if status:
+        queryset = queryset.filter(investigation_status=status)
+    if search:
+        queryset = search_reports(queryset, search)
+    return queryset
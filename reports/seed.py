@@ -0,0 +1,265 @@
+"""
+Bulk generation of realistic users, reports and comments.
+
+Used by ``manage.py generate_data`` and ``benchmark_suite --seed``. Rows
+are inserted with ``bulk_create`` in batches, one transaction per batch,
+so neither ``save()`` nor the ``post_save`` signals run: profiles are
+created in bulk next to their users, and the status counters, content
+versions and caches that those hooks normally maintain are brought up to
+date once at the end.
+
+The data is shaped like production rather than uniform: a few airports
+get most reports, older reports are more likely to be closed, and
+comment threads follow a long-tailed distribution where a handful of
+reports collect thousands of comments. A given seed on an empty database
+always produces the same rows.
+"""
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_on_commit
+from .models import (
+    Comment,
+    ContentVersion,
+    InvestigationStatusCount,
+    SafetyReport,
+    UserProfile,
+)
+
+# Every generated user can log in with this password
+SEED_PASSWORD = 'seed-password'
+
+# Busiest first; reports are spread over them with Zipf-like weights
+PLACES = [
+    'London Heathrow', 'Paris Charles de Gaulle', 'Amsterdam Schiphol',
+    'Frankfurt', 'Madrid Barajas', 'Dublin', 'Istanbul', 'Munich',
+    'Rome Fiumicino', 'Barcelona El Prat', 'London Gatwick', 'Zurich',
+    'Copenhagen', 'Vienna', 'Oslo Gardermoen', 'Lisbon', 'Brussels',
+    'Stockholm Arlanda', 'Helsinki', 'Athens', 'Manchester', 'Milan Malpensa',
+    'Warsaw Chopin', 'Prague', 'Edinburgh', 'Geneva', 'Hamburg', 'Nice',
+    'Budapest', 'Shannon', 'Cork', 'Bergen',
+]
+
+DESCRIPTIONS = [
+    'Runway incursion during taxi to the holding point.',
+    'Bird strike on the left engine during the initial climb.',
+    'Unstable approach continued below the stabilisation gate.',
+    'Loss of separation with traffic on the parallel runway.',
+    'Ground vehicle crossed the taxiway without clearance.',
+    'Hydraulic pressure warning on the B system after take-off.',
+    'Smoke smell in the cabin during cruise, no source found.',
+    'Laser illumination of the flight deck on final approach.',
+    'Go-around after a late landing clearance.',
+    'Fuel imbalance alert during the descent.',
+]
+
+COMMENTS = [
+    'Confirmed by the tower log.',
+    'Maintenance inspected the aircraft, no damage found.',
+    'Similar event reported last month at the same stand.',
+    'Crew statement attached to the investigation file.',
+    'Awaiting the flight data recorder download.',
+    'Ground handling agent has been briefed.',
+    'Adding this to the next safety committee agenda.',
+    'Closed on our side, thanks for the report.',
+]
+
+# (age in days up to, status weights) - older reports are mostly resolved
+STATUS_WEIGHTS = [
+    (30, {'waiting': 60, 'investigating': 35, 'closed': 3, 'dismissed': 2}),
+    (180, {'waiting': 15, 'investigating': 40, 'closed': 35, 'dismissed': 10}),
+    (None, {'waiting': 2, 'investigating': 8, 'closed': 70, 'dismissed': 20}),
+]
+
+
+def batches(total, batch_size):
+    """(start, size) of each batch covering range(total)"""
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+
+def zipf_weights(count, exponent=1.0):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """
+    Let bulk_create keep the created_at/updated_at values it is given.
+
+    auto_now and auto_now_add overwrite them on insert, which would stamp
+    a generated history with the current time.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_users(count, rng, batch_size, prefix='seed'):
+    """Create users with profiles; returns the new user ids"""
+    # Hashing is deliberately slow, so every user shares one hash
+    password = make_password(SEED_PASSWORD)
+    offset = User.objects.filter(username__startswith=prefix).count()
+    ids = []
+    for start, size in batches(count, batch_size):
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                User(
+                    username=f'{prefix}{offset + start + i}',
+                    email=f'{prefix}{offset + start + i}@example.com',
+                    password=password,
+                )
+                for i in range(size)
+            )
+            UserProfile.objects.bulk_create(
+                UserProfile(
+                    user=user,
+                    role=rng.choices(
+                        ('regular', 'investigator', 'admin'), (94, 5, 1)
+                    )[0]
+                )
+                for user in users
+            )
+        ids.extend(user.pk for user in users)
+    return ids
+
+
+def seed_reports(count, author_ids, rng, batch_size, days):
+    """
+    Create reports by the given authors over the last ``days`` days.
+
+    Returns [(report id, created_at)] in creation order.
+    """
+    now = timezone.now()
+    place_weights = list(itertools.accumulate(zipf_weights(len(PLACES))))
+    # A few prolific reporters, a long tail of occasional ones
+    author_weights = list(
+        itertools.accumulate(zipf_weights(len(author_ids), 0.8))
+    )
+    created = []
+    for start, size in batches(count, batch_size):
+        reports = []
+        for i in range(size):
+            # Oldest first, so ids follow created_at as they do live
+            age = timedelta(
+                days=days * (1 - (start + i + rng.random()) / count)
+            )
+            created_at = now - age
+            occurred = created_at - timedelta(hours=rng.expovariate(1 / 36))
+            for limit, weights in STATUS_WEIGHTS:
+                if limit is None or age.days < limit:
+                    break
+            reports.append(SafetyReport(
+                author_id=rng.choices(
+                    author_ids, cum_weights=author_weights
+                )[0],
+                place=rng.choices(PLACES, cum_weights=place_weights)[0],
+                date=timezone.localtime(occurred).date(),
+                time=timezone.localtime(occurred).time().replace(
+                    second=0, microsecond=0
+                ),
+                description=' '.join(rng.sample(DESCRIPTIONS, 2)),
+                investigation_status=rng.choices(
+                    list(weights), list(weights.values())
+                )[0],
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        with transaction.atomic(), explicit_timestamps(SafetyReport):
+            SafetyReport.objects.bulk_create(reports)
+        created.extend((report.pk, report.created_at) for report in reports)
+    return created
+
+
+def seed_comments(count, reports, author_ids, rng, batch_size):
+    """
+    Create comments on the given [(report id, created_at)].
+
+    Threads are long-tailed: each report gets a Pareto-distributed share,
+    so most have a few comments and the busiest have thousands.
+    """
+    now = timezone.now()
+    report_weights = list(itertools.accumulate(
+        rng.paretovariate(1.1) for _ in reports
+    ))
+    for start, size in batches(count, batch_size):
+        comments = []
+        for report_id, report_created in rng.choices(
+            reports, cum_weights=report_weights, k=size
+        ):
+            created_at = min(
+                now,
+                report_created + timedelta(hours=rng.expovariate(1 / 48))
+            )
+            comments.append(Comment(
+                report_id=report_id,
+                author_id=rng.choice(author_ids),
+                content=rng.choice(COMMENTS),
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+        with transaction.atomic(), explicit_timestamps(Comment):
+            Comment.objects.bulk_create(comments)
+
+
+def finish_seeding():
+    """Bring the denormalized data up to date after bulk inserts"""
+    with transaction.atomic():
+        InvestigationStatusCount.rebuild()
+        for name in ('reports', 'comments', 'profiles'):
+            ContentVersion.bump(name)
+        for namespace in ('safetyreport', 'comment', 'userprofile'):
+            invalidate_on_commit(namespace)
+
+
+def seed_dataset(users, reports, comments, seed=0, batch_size=5000,
+                 days=3 * 365, progress=None):
+    """
+    Add ``users`` users, ``reports`` reports and ``comments`` comments.
+
+    New reports and comments go to the new users, or to existing ones if
+    ``users`` is 0; comments go to the new reports, or to existing ones.
+    ``progress(kind, count)`` is called after each kind is done. Returns
+    {'users': n, 'reports': n, 'comments': n} of rows created.
+    """
+    rng = random.Random(seed)
+    progress = progress or (lambda kind, count: None)
+
+    author_ids = seed_users(users, rng, batch_size)
+    progress('users', users)
+    if not author_ids and (reports or comments):
+        author_ids = list(User.objects.values_list('pk', flat=True))
+        if not author_ids:
+            raise ValueError("Reports and comments need at least one user.")
+
+    created = seed_reports(reports, author_ids, rng, batch_size, days)
+    progress('reports', reports)
+    if comments:
+        if not created:
+            created = list(
+                SafetyReport.objects.values_list('pk', 'created_at')
+            )
+        if not created:
+            raise ValueError("Comments need at least one report.")
+        seed_comments(comments, created, author_ids, rng, batch_size)
+    progress('comments', comments)
+
+    finish_seeding()
+    return {'users': users, 'reports': reports, 'comments': comments}
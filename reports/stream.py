@@ -0,0 +1,127 @@
+"""
+Server-sent events for the investigations dashboard.
+
+Every open dashboard keeps one stream open. Streams in the same process
+share a single cheap change check (the newest counter ``updated_at``),
+run at most once per poll interval however many viewers there are, and
+the stats payload is only pushed when that version moves. The payload
+comes from the reports cache layer, keyed on that same version, so a
+change made by another process is never pushed with the old counts.
+
+Streams last minutes, and a database connection opened in a request's
+thread stays open until the response ends. So a stream hands back its
+request's connection as soon as it starts, and the checks and payloads
+of all streams run on one worker thread of their own: however many
+dashboards are open, a process holds one connection for them.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import SafetyReport, InvestigationStatusCount
+
+_latest = {
+    'checked_at': 0.0,
+    'version': None,
+    'summary': (None, None),
+}
+
+_db_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix='status-stream'
+)
+
+
+def reset_version_check():
+    """Make the next stream tick re-read the version immediately"""
+    _latest['checked_at'] = 0.0
+    _latest['summary'] = (None, None)
+
+
+@receiver(post_save, sender=SafetyReport)
+@receiver(post_delete, sender=SafetyReport)
+def push_status_change(sender, **kwargs):
+    # Writes in this process are pushed without waiting for the interval;
+    # other workers notice them on their next check
+    reset_version_check()
+
+
+def _with_connection(func, *args):
+    # What a request does around a view: drop a connection that is broken
+    # or past CONN_MAX_AGE before and after using it
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def on_stream_thread(func, *args):
+    """Run func(*args) on the thread shared by every stream's queries"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _db_executor, _with_connection, func, *args
+    )
+
+
+def read_version():
+    version = InvestigationStatusCount.objects.aggregate(
+        version=Max('updated_at')
+    )['version']
+    return version.isoformat() if version else '0'
+
+
+async def current_version():
+    """Latest counter change as a string, re-read at most once per poll"""
+    now = time.monotonic()
+    if now - _latest['checked_at'] >= settings.INVESTIGATION_STREAM_POLL:
+        # Claim the check before awaiting so concurrent streams skip it
+        _latest['checked_at'] = now
+        _latest['version'] = await on_stream_thread(read_version)
+    return _latest['version']
+
+
+async def current_summary(build_summary, version):
+    """build_summary(version), built once per version for all streams"""
+    built_for, summary = _latest['summary']
+    if built_for != version:
+        summary = await on_stream_thread(build_summary, version)
+        _latest['summary'] = (version, summary)
+    return summary
+
+
+async def status_events(build_summary, last_event_id=None):
+    """
+    Yield SSE messages until the stream reaches its maximum age.
+
+    A ``stats`` event is sent on connect (unless the client already has
+    that version) and whenever the version changes; comment lines keep
+    idle connections alive through proxies. ``build_summary(version)``
+    returns the stats of a version.
+    """
+    started = time.monotonic()
+    last_sent = time.monotonic()
+    # Release whatever the middleware opened in the request's thread (with
+    # CONN_MAX_AGE = 0) rather than holding it until the stream ends
+    await sync_to_async(close_old_connections)()
+    yield f"retry: {settings.INVESTIGATION_STREAM_RETRY_MS}\n\n"
+
+    while time.monotonic() - started < settings.INVESTIGATION_STREAM_MAX_AGE:
+        version = await current_version()
+        if version != last_event_id:
+            payload = json.dumps(
+                await current_summary(build_summary, version)
+            )
+            yield f"id: {version}\nevent: stats\ndata: {payload}\n\n"
+            last_event_id = version
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= 15:
+            yield ": keepalive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(settings.INVESTIGATION_STREAM_POLL)
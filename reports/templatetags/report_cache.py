@@ -0,0 +1,55 @@
+from django import template
+from django.conf import settings
+
+from ..cache import fragment_cache, fragment_key, record_lookup
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = fragment_key(name, vary_on)
+        cache = fragment_cache()
+
+        value = cache.get(key)
+        record_lookup('fragments', name, value is not None)
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, settings.FRAGMENT_CACHE_TIMEOUT)
+        return value
+
+
+@register.tag('cachefragment')
+def do_cachefragment(parser, token):
+    """
+    Cache the enclosed template fragment, versioned by its inputs.
+
+    Usage::
+
+        {% cachefragment "board-card" report.pk report.updated_at %}
+            ...
+        {% endcachefragment %}
+
+    Every value after the name becomes part of the key, so pass whatever
+    the fragment depends on; when any of them changes a new entry is
+    rendered and the old one expires on its own.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least a fragment name."
+        )
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]]
+    )
@@ -0,0 +1,28 @@
+from django import template
+
+from ..images import derivative_url, responsive_image
+
+register = template.Library()
+
+
+@register.simple_tag
+def report_image(image, layout, alt='', css_class=''):
+    """
+    Responsive, lazily loaded markup for a report image.
+
+    Usage::
+
+        {% report_image report.image "detail" alt="..." css_class="..." %}
+
+    ``layout`` is one of reports.images.LAYOUTS; renders nothing when
+    there is no image.
+    """
+    return responsive_image(image, layout, alt, css_class)
+
+
+@register.simple_tag
+def report_image_url(image, derivative='full'):
+    """URL of one derivative (see reports.images.DERIVATIVES)"""
+    if not image:
+        return ''
+    return derivative_url(image, derivative)
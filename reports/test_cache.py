@@ -0,0 +1,137 @@
+"""
+Test module for the reports caching layer.
+"""
+import tempfile
+from unittest import mock
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from datetime import date, time
+from .cache import (cached, clear_caches, invalidate, namespace_invalidated,
+                    versioned_key)
+from .models import SafetyReport, Comment
+
+
+class CacheLayerTest(TestCase):
+    """Test suite for versioned namespaces and model invalidation"""
+
+    def setUp(self):
+        """Set up empty caches and test data"""
+        clear_caches()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.report = SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test description'
+        )
+        self.calls = 0
+
+    def compute(self):
+        """Stand-in for an expensive query"""
+        self.calls += 1
+        return self.calls
+
+    def test_cached_value_is_reused(self):
+        """Test that a second lookup does not recompute"""
+        self.assertEqual(cached('safetyreport', 'answer', self.compute), 1)
+        self.assertEqual(cached('safetyreport', 'answer', self.compute), 1)
+
+    def test_invalidate_changes_key(self):
+        """Test that invalidating a namespace forces a recompute"""
+        key = versioned_key('safetyreport', 'answer')
+        invalidate('safetyreport')
+        self.assertNotEqual(versioned_key('safetyreport', 'answer'), key)
+
+    def test_model_saves_and_deletes_invalidate(self):
+        """Test that model changes bump the matching namespace only"""
+        cached(('safetyreport', 'comment'), 'both', self.compute)
+        cached('userprofile', 'profiles', self.compute)
+
+        comment = Comment.objects.create(
+            report=self.report, author=self.user, content='New'
+        )
+        self.assertEqual(
+            cached(('safetyreport', 'comment'), 'both', self.compute), 3
+        )
+        self.assertEqual(cached('userprofile', 'profiles', self.compute), 2)
+
+        comment.delete()
+        self.assertEqual(
+            cached(('safetyreport', 'comment'), 'both', self.compute), 4
+        )
+
+        self.user.profile.role = 'investigator'
+        self.user.profile.save()
+        self.assertEqual(cached('userprofile', 'profiles', self.compute), 5)
+
+    def test_invalidation_is_broadcast(self):
+        """Test that invalidations are sent on the namespace signal"""
+        seen = []
+
+        def listener(sender, namespace, **kwargs):
+            seen.append(namespace)
+
+        namespace_invalidated.connect(listener)
+        try:
+            self.report.delete()
+        finally:
+            namespace_invalidated.disconnect(listener)
+        self.assertIn('safetyreport', seen)
+
+    def test_status_summary_cached_until_status_changes(self):
+        """Test that the dashboard data is served from the cache"""
+        client = Client()
+        client.get(reverse('get_investigation_data'))
+        with self.assertNumQueries(1):
+            response = client.get(reverse('get_investigation_data'))
+        self.assertEqual(response.json()['status_data']['waiting'], 1)
+
+        self.report.investigation_status = 'closed'
+        self.report.save()
+        response = client.get(reverse('get_investigation_data'))
+        self.assertEqual(response.json()['status_data']['closed'], 1)
+
+    def test_status_summary_follows_other_processes(self):
+        """Test that counters changed elsewhere are never served stale"""
+        client = Client()
+        first = client.get(reverse('get_investigation_data'))
+        # As in another worker: the counters change in the database but
+        # the namespace bump never reaches this process's cache
+        with mock.patch('reports.models.invalidate_on_commit'):
+            self.report.investigation_status = 'closed'
+            self.report.save()
+        response = client.get(
+            reverse('get_investigation_data'),
+            headers={'if-none-match': first['ETag']}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status_data']['waiting'], 0)
+        self.assertEqual(response.json()['status_data']['closed'], 1)
+
+
+class FileCacheBackendTest(TestCase):
+    """Test suite for running the layer on the file-based backend"""
+
+    def test_file_backend(self):
+        """Test that cached values and invalidation work on disk"""
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        backend = 'django.core.cache.backends.filebased.FileBasedCache'
+        caches = {
+            alias: {
+                'BACKEND': backend,
+                'LOCATION': f'{location.name}/{alias}',
+            }
+            for alias in ('default', 'fragments', 'reports')
+        }
+        with override_settings(CACHES=caches):
+            self.assertEqual(cached('comment', 'key', lambda: 'a'), 'a')
+            self.assertEqual(cached('comment', 'key', lambda: 'b'), 'a')
+            invalidate('comment')
+            self.assertEqual(cached('comment', 'key', lambda: 'c'), 'c')
@@ -0,0 +1,408 @@
+"""
+Test module for reports management commands.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.contrib.auth.models import User
+from datetime import date, time, timedelta
+from .models import (SafetyReport, Comment, ContentVersion,
+                     InvestigationStatusCount, UserProfile)
+
+
+class RebuildStatusCountsCommandTest(TestCase):
+    """Test suite for the rebuild_status_counts command"""
+
+    def setUp(self):
+        """Set up test user and reports"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        for status in ['waiting', 'waiting', 'dismissed']:
+            SafetyReport.objects.create(
+                author=self.user,
+                place='Test Airport',
+                date=date(2025, 1, 15),
+                time=time(14, 30),
+                description='Test description',
+                investigation_status=status
+            )
+
+    def test_check_passes_when_counters_match(self):
+        """Test that --check succeeds on consistent counters"""
+        out = StringIO()
+        call_command('rebuild_status_counts', '--check', stdout=out)
+        self.assertIn('match', out.getvalue())
+
+    def test_check_fails_on_drift(self):
+        """Test that --check reports counters that drifted"""
+        InvestigationStatusCount.objects.filter(
+            status='waiting'
+        ).update(count=7)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_status_counts', '--check')
+
+    def test_rebuild_restores_counts(self):
+        """Test that the command rebuilds drifted counters"""
+        InvestigationStatusCount.objects.all().delete()
+        call_command('rebuild_status_counts', stdout=StringIO())
+        counts = InvestigationStatusCount.current()
+        self.assertEqual(counts['waiting'], 2)
+        self.assertEqual(counts['dismissed'], 1)
+
+
+class ImportReportsCommandTest(TestCase):
+    """Test suite for the import_reports command"""
+
+    def setUp(self):
+        """Set up a known author"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='Test@Example.com',
+            password='testpass123'
+        )
+
+    def write_file(self, suffix, content):
+        """Write content to a temporary input file and return its path"""
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, *args):
+        """Run the command and return (stdout, stderr)"""
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_reports', path, '--batch-size', '2', *args,
+            stdout=out, stderr=err
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv_in_batches(self):
+        """Test that valid rows are imported and bad rows reported"""
+        path = self.write_file('.csv', (
+            'place,date,time,description,author_email,investigation_status\n'
+            'EGLL,2019-03-01,10:15,Bird strike,test@example.com,closed\n'
+            'EGKK,2019-03-02,11:00,Tug collision,test@example.com,\n'
+            ',2019-03-03,12:00,No place,test@example.com,\n'
+            'LFPG,2019-03-04,13:00,Unknown author,nobody@example.com,\n'
+            'EDDF,not-a-date,14:00,Bad date,test@example.com,\n'
+            'EHAM,2019-03-05,15:00,Bad status,test@example.com,lost\n'
+        ))
+        out, err = self.run_import(path)
+        self.assertEqual(SafetyReport.objects.count(), 2)
+        self.assertIn('Imported 2 reports, 4 rows rejected', out)
+        self.assertIn('line 4: place', err)
+        self.assertIn("line 5: author_email: no user 'nobody@example.com'",
+                      err)
+        self.assertIn('line 6: date', err)
+        self.assertIn('line 7: investigation_status', err)
+
+        report = SafetyReport.objects.get(place='EGLL')
+        self.assertEqual(report.author, self.user)
+        self.assertEqual(report.investigation_status, 'closed')
+        counts = InvestigationStatusCount.current()
+        self.assertEqual(counts['closed'], 1)
+        self.assertEqual(counts['waiting'], 1)
+
+    def test_import_jsonl(self):
+        """Test that JSON Lines input is imported"""
+        rows = [
+            {'place': 'KJFK', 'date': '2020-01-01', 'time': '08:00',
+             'description': 'Runway incursion',
+             'author_email': 'test@example.com'},
+            {'place': 'KLAX', 'date': '2020-01-02', 'time': '09:00',
+             'description': 'Laser strike',
+             'author_email': 'test@example.com'},
+        ]
+        path = self.write_file(
+            '.jsonl',
+            '\n'.join(json.dumps(row) for row in rows) + '\n{broken\n'
+        )
+        out, err = self.run_import(path)
+        self.assertEqual(SafetyReport.objects.count(), 2)
+        self.assertIn('line 3: invalid row', err)
+
+    def test_import_rejects_null_and_non_string_values(self):
+        """Test that nulls, numbers and lists are per-row errors"""
+        rows = [
+            {'place': 'KJFK', 'date': '2020-01-01', 'time': '08:00',
+             'description': 'No author', 'author_email': None},
+            {'place': 'KLAX', 'date': 20200102, 'time': '09:00',
+             'description': 'Numeric date',
+             'author_email': 'test@example.com'},
+            {'place': 'KSFO', 'date': '2020-01-03', 'time': '10:00',
+             'description': 'Listed status',
+             'author_email': 'test@example.com',
+             'investigation_status': ['closed']},
+            {'place': 'KBOS', 'date': '2020-01-04', 'time': '11:00',
+             'description': 'Null status',
+             'author_email': 'test@example.com',
+             'investigation_status': None},
+        ]
+        path = self.write_file(
+            '.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        out, err = self.run_import(path)
+        self.assertIn('Imported 1 reports, 3 rows rejected', out)
+        self.assertIn("line 1: author_email: no user ''", err)
+        self.assertIn('line 2: date', err)
+        self.assertIn('line 3: investigation_status', err)
+        self.assertEqual(
+            SafetyReport.objects.get().investigation_status, 'waiting'
+        )
+
+    def test_import_rejects_lists_and_objects(self):
+        """Test that values the form would accept as their repr are rejected"""
+        rows = [
+            {'place': ['EGLL', 'EGKK'], 'date': '2020-01-01',
+             'time': '08:00', 'description': 'Two places',
+             'author_email': 'test@example.com'},
+            {'place': 'EGLL', 'date': '2020-01-02', 'time': '09:00',
+             'description': {'text': 'Nested'},
+             'author_email': 'test@example.com'},
+            {'place': True, 'date': '2020-01-03', 'time': '10:00',
+             'description': 'Boolean place',
+             'author_email': 'test@example.com'},
+        ]
+        path = self.write_file(
+            '.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        out, err = self.run_import(path)
+        self.assertIn('Imported 0 reports, 3 rows rejected', out)
+        self.assertIn('line 1: place: expected text, got ["EGLL", "EGKK"]',
+                      err)
+        self.assertIn('line 2: description: expected text', err)
+        self.assertIn('line 3: place: expected text, got true', err)
+        self.assertFalse(SafetyReport.objects.exists())
+
+    def test_import_csv_with_missing_columns(self):
+        """Test that CSV rows short of trailing columns are rejected"""
+        path = self.write_file('.csv', (
+            'place,date,time,description,author_email\n'
+            'EGLL,2019-03-01,10:15\n'
+            'EGKK,2019-03-02,11:00,Tug collision,test@example.com\n'
+        ))
+        out, err = self.run_import(path)
+        self.assertIn('Imported 1 reports, 1 rows rejected', out)
+        self.assertIn('line 2: description', err)
+
+    def test_dry_run_writes_nothing(self):
+        """Test that --dry-run validates without inserting"""
+        path = self.write_file('.csv', (
+            'place,date,time,description,author_email\n'
+            'EGLL,2019-03-01,10:15,Bird strike,test@example.com\n'
+        ))
+        out, err = self.run_import(path, '--dry-run')
+        self.assertIn('Validated 1 reports', out)
+        self.assertEqual(SafetyReport.objects.count(), 0)
+
+    def test_missing_file(self):
+        """Test that an unreadable path is a command error"""
+        with self.assertRaises(CommandError):
+            self.run_import('/nonexistent/reports.csv')
+
+
+class ExportReportsCommandTest(TestCase):
+    """Test suite for the export_reports command"""
+
+    def setUp(self):
+        """Set up a report with a comment"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.report = SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test description'
+        )
+        Comment.objects.create(
+            report=self.report, author=self.user, content='Test comment'
+        )
+
+    def test_export_ndjson_to_stdout(self):
+        """Test that reports are written with their comments"""
+        out = StringIO()
+        call_command('export_reports', '--format', 'ndjson', stdout=out)
+        records = [
+            json.loads(line) for line in out.getvalue().splitlines() if line
+        ]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['comments'][0]['content'], 'Test comment')
+
+    def test_export_round_trips_through_import(self):
+        """Test that an export imports as one new report per report"""
+        for content in ('Second comment', 'Third comment'):
+            Comment.objects.create(
+                report=self.report, author=self.user, content=content
+            )
+        paths = []
+        for file_format in ('csv', 'ndjson'):
+            handle, path = tempfile.mkstemp(suffix=f'.{file_format}')
+            os.close(handle)
+            self.addCleanup(os.remove, path)
+            call_command(
+                'export_reports', '--format', file_format, '--output', path
+            )
+            paths.append(path)
+        for path in paths:
+            out = StringIO()
+            call_command(
+                'import_reports', path, stdout=out, stderr=StringIO()
+            )
+            self.assertIn(
+                'Imported 1 reports, 0 rows rejected', out.getvalue()
+            )
+        self.assertEqual(
+            SafetyReport.objects.filter(place='Test Airport').count(), 3
+        )
+
+    def test_export_status_filter(self):
+        """Test that --status limits the exported reports"""
+        out = StringIO()
+        call_command('export_reports', '--status', 'closed', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 1)
+
+
+class BenchmarkSuiteCommandTest(TestCase):
+    """Test suite for the benchmark_suite command"""
+
+    def run_suite(self, *args):
+        """Run the suite on a small seeded dataset, returning its JSON"""
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command(
+            'benchmark_suite', '--seed', '--users', '3', '--reports', '5',
+            '--comments', '20', '--requests', '3', '--warmup', '0',
+            '--output', path, *args, stdout=StringIO()
+        )
+        with open(path, encoding='utf-8') as results:
+            return json.load(results)
+
+    def test_writes_baseline(self):
+        """Test that every scenario gets latency and query figures"""
+        results = self.run_suite()
+        self.assertEqual(results['meta']['reports'], 5)
+        self.assertEqual(results['meta']['comments'], 20)
+        self.assertEqual(set(results['scenarios']), {
+            'board', 'board_search', 'report_detail', 'investigations',
+            'investigation_data', 'create_report',
+        })
+        for figures in results['scenarios'].values():
+            self.assertLessEqual(figures['p50_ms'], figures['p99_ms'])
+            self.assertGreater(figures['queries_per_request'], 0)
+
+    def test_create_report_is_rolled_back(self):
+        """Test that the write scenario leaves the data as it was"""
+        self.run_suite('--scenario', 'create_report')
+        self.assertEqual(SafetyReport.objects.count(), 5)
+
+    def test_seeding_keeps_denormalized_data_in_step(self):
+        """Test that bulk seeding maintains profiles, counters, versions"""
+        versions = ContentVersion.current()
+        self.run_suite('--scenario', 'investigation_data')
+        self.assertEqual(
+            UserProfile.objects.count(), User.objects.count()
+        )
+        self.assertEqual(
+            InvestigationStatusCount.current(),
+            InvestigationStatusCount.actual()
+        )
+        self.assertGreater(
+            ContentVersion.current()['comments'][0],
+            versions.get('comments', (0,))[0]
+        )
+
+    def test_unknown_scenario(self):
+        """Test that an unknown scenario name is rejected"""
+        with self.assertRaises(CommandError):
+            self.run_suite('--scenario', 'nope')
+
+
+class GenerateDataCommandTest(TestCase):
+    """Test suite for the generate_data command"""
+
+    def generate(self, *args):
+        """Run the command with small default sizes"""
+        call_command(
+            'generate_data', '--users', '5', '--reports', '40',
+            '--comments', '2000', '--batch-size', '300', *args,
+            stdout=StringIO()
+        )
+
+    def snapshot(self):
+        """Generated rows without their ids and timestamps"""
+        reports = list(SafetyReport.objects.order_by('pk'))
+        position = {report.pk: i for i, report in enumerate(reports)}
+        return (
+            list(UserProfile.objects.order_by('user__username').values_list(
+                'user__username', 'role'
+            )),
+            [
+                (report.author.username, report.place, report.date,
+                 report.investigation_status, report.description)
+                for report in reports
+            ],
+            [
+                (position[comment.report_id], comment.content)
+                for comment in Comment.objects.order_by('pk')
+            ],
+        )
+
+    def test_same_seed_generates_same_rows(self):
+        """Test that generation is deterministic for a given seed"""
+        self.generate('--random-seed', '7')
+        first = self.snapshot()
+        User.objects.all().delete()
+        self.generate('--random-seed', '7')
+        self.assertEqual(self.snapshot(), first)
+
+    def test_profiles_and_counters(self):
+        """Test that bulk users get profiles and the counters are rebuilt"""
+        self.generate()
+        self.assertEqual(UserProfile.objects.count(), 5)
+        self.assertEqual(
+            InvestigationStatusCount.current(),
+            InvestigationStatusCount.actual()
+        )
+
+    def test_history_is_spread_and_skewed(self):
+        """Test that reports span the days and threads are long-tailed"""
+        self.generate('--days', '100')
+        created = SafetyReport.objects.order_by('created_at').values_list(
+            'created_at', flat=True
+        )
+        self.assertGreater(created.last() - created.first(), timedelta(50))
+        self.assertFalse(
+            Comment.objects.filter(
+                created_at__lt=F('report__created_at')
+            ).exists()
+        )
+        threads = sorted(
+            Comment.objects.values('report').annotate(
+                count=Count('pk')
+            ).values_list('count', flat=True)
+        )
+        self.assertGreater(threads[-1], 10 * threads[len(threads) // 2])
+        # The auto_now fields are restored afterwards
+        self.assertTrue(
+            SafetyReport._meta.get_field('created_at').auto_now_add
+        )
+
+    def test_rejects_negative_counts(self):
+        """Test that negative sizes are an error"""
+        with self.assertRaises(CommandError):
+            self.generate('--reports', '-1')
@@ -1,10 +1,15 @@
 """
 Test module for reports models.
 """
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from datetime import date, time
-from .models import UserProfile, SafetyReport, Comment
+from django.utils import timezone
+from datetime import date, time, timedelta
+from .models import (UserProfile, SafetyReport, Comment, CommentDeletion,
+                     InvestigationStatusCount, ContentVersion,
+                     comment_count)
 
 
 class UserProfileModelTest(TestCase):
@@ -64,6 +69,31 @@ class UserProfileModelTest(TestCase):
         self.user.profile.save()
         self.assertTrue(self.user.profile.is_admin())
 
+    def test_user_save_skips_unchanged_profile(self):
+        """Test that saving a user (e.g. on login) leaves the profile alone"""
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_user_save_persists_profile_change(self):
+        """Test that a role edited through the user is saved with it"""
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        user.profile.role = 'investigator'
+        user.save()
+        self.assertEqual(
+            UserProfile.objects.get(user=self.user).role, 'investigator'
+        )
+
+    def test_user_save_creates_missing_profile(self):
+        """Test that a user loaded without a profile gets one on save"""
+        UserProfile.objects.filter(user=self.user).delete()
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        user.save()
+        self.assertTrue(UserProfile.objects.filter(user=self.user).exists())
+
 
 class SafetyReportModelTest(TestCase):
     """Test suite for SafetyReport model"""
@@ -202,3 +232,290 @@ class CommentModelTest(TestCase):
         comments = self.report.comments.all()
         self.assertEqual(comments[0], self.comment)
         self.assertEqual(comments[1], comment2)
+
+    def test_delete_records_tombstone(self):
+        """Test that deleting a comment leaves a tombstone for pollers"""
+        pk = self.comment.pk
+        self.comment.delete()
+        deletion = CommentDeletion.objects.get()
+        self.assertEqual(deletion.report_id, self.report.pk)
+        self.assertEqual(deletion.comment_id, pk)
+
+    @override_settings(COMMENT_DELETIONS_MAX_AGE=60)
+    def test_old_tombstones_are_pruned(self):
+        """Test that recording a deletion prunes expired tombstones"""
+        CommentDeletion.objects.create(
+            report=self.report, comment_id=0,
+            deleted_at=timezone.now() - timedelta(minutes=2)
+        )
+        pk = self.comment.pk
+        self.comment.delete()
+        self.assertEqual(
+            list(CommentDeletion.objects.values_list(
+                'comment_id', flat=True
+            )),
+            [pk]
+        )
+
+    @override_settings(COMMENT_DELETIONS_MAX_AGE=60)
+    def test_old_tombstones_of_other_reports_are_pruned(self):
+        """Test that pruning is by age across every report"""
+        other = SafetyReport.objects.create(
+            author=self.user, place='Other Airport', date=date(2023, 12, 1),
+            time=time(9, 0), description='Other incident'
+        )
+        CommentDeletion.objects.create(
+            report=other, comment_id=0,
+            deleted_at=timezone.now() - timedelta(minutes=2)
+        )
+        self.comment.delete()
+        self.assertFalse(CommentDeletion.objects.filter(report=other).exists())
+
+    def test_report_delete_leaves_no_tombstones(self):
+        """Test that comments deleted with their report get no tombstones"""
+        self.report.delete()
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(CommentDeletion.objects.exists())
+
+    def test_user_delete_keeps_tombstones_of_other_reports(self):
+        """Test that a user's comments on others' reports get tombstones"""
+        commenter = User.objects.create_user(
+            username='commenter', email='commenter@example.com',
+            password='testpass123'
+        )
+        own = SafetyReport.objects.create(
+            author=commenter, place='Own Airport', date=date(2023, 12, 1),
+            time=time(9, 0), description='Own incident'
+        )
+        Comment.objects.create(report=own, author=commenter, content='Mine')
+        kept = Comment.objects.create(
+            report=self.report, author=commenter, content='Theirs'
+        )
+        commenter.delete()
+        self.assertEqual(
+            list(CommentDeletion.objects.values_list(
+                'report_id', 'comment_id'
+            )),
+            [(self.report.pk, kept.pk)]
+        )
+
+    def test_deletes_take_constant_queries(self):
+        """Test that deleting more comments or a longer thread costs no more"""
+        def queries(delete):
+            with CaptureQueriesContext(connection) as captured:
+                delete()
+            return len(captured)
+
+        def thread(size):
+            report = SafetyReport.objects.create(
+                author=self.user, place='Busy Airport',
+                date=date(2023, 12, 1), time=time(9, 0),
+                description='Busy incident'
+            )
+            Comment.objects.bulk_create(
+                Comment(report=report, author=self.user, content='Busy')
+                for _ in range(size)
+            )
+            return report
+
+        small, large = thread(2), thread(20)
+        self.assertEqual(
+            queries(Comment.objects.filter(report=small).delete),
+            queries(Comment.objects.filter(report=large).delete)
+        )
+        self.assertEqual(CommentDeletion.objects.count(), 22)
+        small, large = thread(2), thread(20)
+        self.assertEqual(queries(small.delete), queries(large.delete))
+
+
+class InvestigationStatusCountModelTest(TestCase):
+    """Test suite for the denormalized investigation status counters"""
+
+    def setUp(self):
+        """Set up test user and a couple of reports"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.report = self.create_report()
+        self.create_report(investigation_status='closed')
+
+    def create_report(self, **kwargs):
+        """Create a report with default test values"""
+        return SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test safety incident description',
+            **kwargs
+        )
+
+    def test_counts_follow_report_creation(self):
+        """Test that creating reports increments their status counter"""
+        counts = InvestigationStatusCount.current()
+        self.assertEqual(counts['waiting'], 1)
+        self.assertEqual(counts['closed'], 1)
+        self.assertEqual(counts['investigating'], 0)
+
+    def test_counts_follow_status_change(self):
+        """Test that a status change moves one report between counters"""
+        self.report.investigation_status = 'investigating'
+        self.report.save()
+        counts = InvestigationStatusCount.current()
+        self.assertEqual(counts['waiting'], 0)
+        self.assertEqual(counts['investigating'], 1)
+
+    def test_counts_unchanged_by_other_edits(self):
+        """Test that saving without a status change leaves counters alone"""
+        self.report.place = 'Other Airport'
+        self.report.save()
+        self.assertEqual(
+            InvestigationStatusCount.current(),
+            InvestigationStatusCount.actual()
+        )
+
+    def test_counts_follow_deletes(self):
+        """Test that single and queryset deletes decrement counters"""
+        self.report.delete()
+        self.assertEqual(InvestigationStatusCount.current()['waiting'], 0)
+        SafetyReport.objects.all().delete()
+        self.assertEqual(InvestigationStatusCount.current()['closed'], 0)
+
+    def test_counts_follow_cascade_from_user(self):
+        """Test that deleting the author removes their reports' counts"""
+        self.user.delete()
+        self.assertEqual(sum(InvestigationStatusCount.current().values()), 0)
+
+    def test_cascade_updates_each_counter_once(self):
+        """Test that a mass delete issues one counter UPDATE per status"""
+        for status in ('waiting', 'closed', 'investigating') * 5:
+            self.create_report(investigation_status=status)
+        with CaptureQueriesContext(connection) as queries:
+            self.user.delete()
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith(
+                'UPDATE "reports_investigationstatuscount"'
+            )
+        ]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(
+            InvestigationStatusCount.current(),
+            InvestigationStatusCount.actual()
+        )
+
+    def test_counts_follow_bulk_status_update(self):
+        """Test that set_status_bulk keeps counters and versions in step"""
+        closed = SafetyReport.objects.get(investigation_status='closed')
+        version = ContentVersion.current()['reports'][0]
+        updated_at = self.report.updated_at
+        results = SafetyReport.set_status_bulk(
+            [self.report.pk, closed.pk, 9999], 'closed'
+        )
+        self.assertEqual(results, {
+            self.report.pk: 'updated',
+            closed.pk: 'unchanged',
+            9999: 'not_found',
+        })
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.investigation_status, 'closed')
+        self.assertGreater(self.report.updated_at, updated_at)
+        self.assertEqual(
+            InvestigationStatusCount.current(),
+            InvestigationStatusCount.actual()
+        )
+        self.assertEqual(ContentVersion.current()['reports'][0], version + 1)
+
+    def test_rebuild_fixes_drift(self):
+        """Test that rebuild recomputes counters from the reports table"""
+        InvestigationStatusCount.objects.update(count=42)
+        InvestigationStatusCount.rebuild()
+        self.assertEqual(
+            InvestigationStatusCount.current(),
+            InvestigationStatusCount.actual()
+        )
+
+
+class QueryPlanTest(TestCase):
+    """Test that the hot queries are served by the composite indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed enough rows for the planner to prefer an index"""
+        # Users only need to exist; skip password hashing and profiles
+        cls.users = User.objects.bulk_create(
+            User(username=f'user{i}') for i in range(20)
+        )
+        statuses = [
+            status for status, _ in SafetyReport.INVESTIGATION_STATUS_CHOICES
+        ]
+        # bulk_create skips save(), which is fine: only the plans matter
+        reports = SafetyReport.objects.bulk_create(
+            SafetyReport(
+                author=cls.users[i % len(cls.users)],
+                place=f'Airport {i}',
+                date=date(2025, 1, 15),
+                time=time(14, 30),
+                description='Seeded report',
+                investigation_status=statuses[i % len(statuses)],
+            )
+            for i in range(5000)
+        )
+        Comment.objects.bulk_create(
+            Comment(
+                report=reports[i % len(reports)],
+                author=cls.users[i % len(cls.users)],
+                content='Seeded comment',
+            )
+            for i in range(10000)
+        )
+        cls.report = reports[-1]
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsesIndex(self, queryset, index):
+        """Assert that the query plan reads through the named index"""
+        plan = queryset.explain()
+        self.assertIn(index, plan, f"{index} not used:\n{plan}")
+
+    def board_reports(self):
+        """The board query as views.board_reports builds it"""
+        return SafetyReport.objects.select_related('author').annotate(
+            comment_count=comment_count()
+        ).order_by('-created_at', '-pk')
+
+    def test_board_page(self):
+        """Test that a board page walks the created_at index"""
+        self.assertUsesIndex(self.board_reports()[:13], 'report_created_idx')
+
+    def test_board_page_by_status(self):
+        """Test that a status-filtered board page uses the status index"""
+        self.assertUsesIndex(
+            self.board_reports().filter(investigation_status='closed')[:13],
+            'report_status_created_idx'
+        )
+
+    def test_reports_of_author(self):
+        """Test that the first-report check uses the author index"""
+        self.assertUsesIndex(
+            self.users[0].safety_reports.order_by(),
+            'report_author_created_idx'
+        )
+
+    def test_comments_of_report(self):
+        """Test that a report's comments come from the report index"""
+        self.assertUsesIndex(
+            self.report.comments.select_related('author'),
+            'comment_report_created_idx'
+        )
+
+    def test_comment_changes_of_report(self):
+        """Test that a report's changed comments use the updated index"""
+        self.assertUsesIndex(
+            self.report.comments.filter(
+                updated_at__gt=timezone.now() - timedelta(minutes=1)
+            ).order_by('updated_at', 'pk'),
+            'comment_report_updated_idx'
+        )
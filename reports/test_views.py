@@ -1,10 +1,34 @@
 """
 Test module for reports views.
 """
-from django.test import TestCase, Client
-from django.urls import reverse
-from django.contrib.auth.models import User
-from datetime import date, time
+from unittest import skipUnless
+from django.db import connection
+from django.db.backends.signals import connection_created
+import asyncio
+import csv
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import warnings
+from unittest import mock
+from django.test import (TestCase, TransactionTestCase, Client,
+                         AsyncClient, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, resolve, reverse
+from django.contrib.auth.models import Permission, User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from datetime import date, time, timedelta
+import cloudinary
+from asgiref.sync import async_to_sync
+from . import api, images, metrics
+from .cache import clear_caches, fragment_stats
 from .models import (SafetyReport,
                      Comment, UserProfile)
 
@@ -70,6 +94,873 @@ class BoardViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn('search_query', response.context)
 
+    def test_board_view_status_filter(self):
+        """Test that the board can be filtered by investigation status"""
+        report = SafetyReport.objects.get(place='Airport 3')
+        report.investigation_status = 'closed'
+        report.save()
+        response = self.client.get(reverse('board'), {'status': 'closed'})
+        self.assertEqual(list(response.context['page_obj']), [report])
+        self.assertEqual(response.context['filter_query'], 'status=closed')
+
+
+class BoardSearchTest(TestCase):
+    """Test suite for full-text search on the board"""
+
+    def setUp(self):
+        """Set up test client and test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.heathrow = SafetyReport.objects.create(
+            author=self.user,
+            place='Heathrow',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Bird strike on departure from runway 27L'
+        )
+        self.gatwick = SafetyReport.objects.create(
+            author=self.user,
+            place='Gatwick',
+            date=date(2025, 1, 16),
+            time=time(9, 0),
+            description='Go-around after a vehicle crossed near Heathrow'
+        )
+
+    def search(self, query):
+        """Return the reports the board shows for a search query"""
+        response = self.client.get(reverse('board'), {'search': query})
+        return list(response.context['page_obj'])
+
+    def test_search_matches_description_words(self):
+        """Test that words in the description are found"""
+        self.assertEqual(self.search('bird strike'), [self.heathrow])
+
+    def test_search_matches_word_prefixes(self):
+        """Test that partial words still match"""
+        self.assertEqual(self.search('Gatw'), [self.gatwick])
+
+    def test_search_ranks_place_matches_first(self):
+        """Test that a match on place outranks one in the description"""
+        self.assertEqual(
+            self.search('heathrow'), [self.heathrow, self.gatwick]
+        )
+
+    def test_search_index_follows_edits_and_deletes(self):
+        """Test that the search index is kept in sync with reports"""
+        self.gatwick.description = 'Laser illumination on final'
+        self.gatwick.save()
+        self.assertEqual(self.search('laser'), [self.gatwick])
+        self.assertEqual(self.search('heathrow'), [self.heathrow])
+        self.heathrow.delete()
+        self.assertEqual(self.search('heathrow'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Test that search operators in user input are not an error"""
+        self.assertEqual(self.search('"runway" (27L'), [self.heathrow])
+        self.assertEqual(self.search('***'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 backend')
+    def test_search_matches_and_ranks_in_one_pass(self):
+        """Test that SQLite search runs a single FTS5 MATCH per query"""
+        with CaptureQueriesContext(connection) as queries:
+            self.search('heathrow')
+        searches = [
+            query['sql'] for query in queries.captured_queries
+            if 'MATCH' in query['sql']
+        ]
+        self.assertTrue(searches)
+        for sql in searches:
+            self.assertEqual(sql.count('MATCH'), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'needs pg_trgm')
+    def test_search_tolerates_typos_in_place(self):
+        """Test that misspelt place names still match via trigrams"""
+        self.assertEqual(self.search('Heathrw'), [self.heathrow])
+        self.assertEqual(self.search('Gatwik'), [self.gatwick])
+
+
+@override_settings(BOARD_PAGINATION='cursor')
+class BoardCursorPaginationTest(TestCase):
+    """Test suite for keyset pagination on the board"""
+
+    def setUp(self):
+        """Set up test client and test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        for i in range(14):
+            SafetyReport.objects.create(
+                author=self.user,
+                place=f'Airport {i}',
+                date=date(2025, 1, 15),
+                time=time(14, 30),
+                description=f'Test description {i}'
+            )
+
+    def places(self, response):
+        """Return the places shown on a board page, in order"""
+        return [report.place for report in response.context['page_obj']]
+
+    def test_search_results_keep_relevance_order(self):
+        """Test that search results are paged by number, ranked first"""
+        SafetyReport.objects.create(
+            author=self.user, place='Heathrow', date=date(2025, 1, 15),
+            time=time(14, 30), description='Place match'
+        )
+        SafetyReport.objects.create(
+            author=self.user, place='Gatwick', date=date(2025, 1, 15),
+            time=time(14, 30), description='Diverted from Heathrow'
+        )
+        response = self.client.get(reverse('board'), {'search': 'heathrow'})
+        self.assertFalse(getattr(response.context['page_obj'], 'is_cursor',
+                                 False))
+        self.assertEqual(self.places(response), ['Heathrow', 'Gatwick'])
+
+    def test_first_page_is_newest_reports(self):
+        """Test that the first cursor page shows the newest reports"""
+        response = self.client.get(reverse('board'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(self.places(response)[0], 'Airport 13')
+        self.assertEqual(len(page_obj), 6)
+        self.assertTrue(page_obj.has_next())
+        self.assertFalse(page_obj.has_previous())
+
+    def test_next_and_previous_cursors(self):
+        """Test walking forward to the last page and back again"""
+        first = self.client.get(reverse('board'))
+        second = self.client.get(
+            reverse('board'),
+            {'after': first.context['page_obj'].next_cursor}
+        )
+        third = self.client.get(
+            reverse('board'),
+            {'after': second.context['page_obj'].next_cursor}
+        )
+        self.assertEqual(self.places(second)[0], 'Airport 7')
+        self.assertEqual(self.places(third), ['Airport 1', 'Airport 0'])
+        self.assertFalse(third.context['page_obj'].has_next())
+
+        back = self.client.get(
+            reverse('board'),
+            {'before': third.context['page_obj'].previous_cursor}
+        )
+        self.assertEqual(self.places(back), self.places(second))
+        back = self.client.get(
+            reverse('board'),
+            {'before': back.context['page_obj'].previous_cursor}
+        )
+        self.assertEqual(self.places(back), self.places(first))
+
+    def test_deep_page_skips_count_query(self):
+        """Test that a cursor page needs one query plus the ETag check"""
+        first = self.client.get(reverse('board'))
+        with self.assertNumQueries(2):
+            self.client.get(
+                reverse('board'),
+                {'after': first.context['page_obj'].next_cursor}
+            )
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Test that a malformed cursor serves the first page"""
+        response = self.client.get(reverse('board'), {'after': 'not-valid'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.places(response)[0], 'Airport 13')
+
+    @override_settings(BOARD_APPROXIMATE_TOTAL=True)
+    def test_approximate_total(self):
+        """Test that the optional total is reported"""
+        SafetyReport.objects.filter(
+            pk__in=SafetyReport.objects.order_by('pk').values('pk')[:5]
+        ).update(investigation_status='closed')
+        response = self.client.get(reverse('board'), {'status': 'closed'})
+        self.assertEqual(response.context['page_obj'].approximate_total, 5)
+        self.assertContains(response, 'About 5 reports')
+
+
+class BoardFragmentCacheTest(TestCase):
+    """Test suite for cached board report cards"""
+
+    def setUp(self):
+        """Set up test client, an empty cache and test data"""
+        self.client = Client()
+        clear_caches()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        self.report = SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test description'
+        )
+
+    def card_stats(self):
+        """Return the hit/miss counters for board cards"""
+        return fragment_stats().get('board-card', {'hits': 0, 'misses': 0})
+
+    def test_second_render_hits_cache(self):
+        """Test that an unchanged card is served from the cache"""
+        self.client.get(reverse('board'))
+        self.client.get(reverse('board'))
+        self.assertEqual(self.card_stats()['misses'], 1)
+        self.assertEqual(self.card_stats()['hits'], 1)
+
+    def test_new_comment_rerenders_card(self):
+        """Test that a new comment changes the card's cache key"""
+        self.client.get(reverse('board'))
+        Comment.objects.create(
+            report=self.report, author=self.user, content='New'
+        )
+        response = self.client.get(reverse('board'))
+        self.assertContains(response, '1 comment')
+        self.assertEqual(self.card_stats()['misses'], 2)
+
+    def test_status_change_rerenders_card(self):
+        """Test that a status change shows up on the cached board"""
+        self.client.get(reverse('board'))
+        self.report.investigation_status = 'closed'
+        self.report.save()
+        response = self.client.get(reverse('board'))
+        self.assertContains(response, 'Investigation closed')
+
+    def test_author_rename_rerenders_card(self):
+        """Test that a new username shows up on the cached board"""
+        self.client.get(reverse('board'))
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(reverse('board'))
+        self.assertContains(response, 'By renamed')
+        self.assertEqual(self.card_stats()['misses'], 2)
+
+    def test_new_release_rerenders_card(self):
+        """Test that cards cached by another release are not reused"""
+        self.client.get(reverse('board'))
+        with override_settings(FRAGMENT_CACHE_VERSION='v2'):
+            self.client.get(reverse('board'))
+        self.assertEqual(self.card_stats()['misses'], 2)
+
+    def test_stats_endpoint_requires_staff(self):
+        """Test that cache stats are exposed to staff only"""
+        response = self.client.get(reverse('cache_stats'))
+        self.assertEqual(response.status_code, 302)
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('board'))
+        response = self.client.get(reverse('cache_stats'))
+        self.assertEqual(
+            response.json()['fragments']['board-card']['misses'], 1
+        )
+
+
+class ExportReportsViewTest(TestCase):
+    """Test suite for the streaming report export"""
+
+    def setUp(self):
+        """Set up test client and reports with comments"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.heathrow = SafetyReport.objects.create(
+            author=self.user,
+            place='Heathrow',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Bird strike on departure',
+            investigation_status='closed'
+        )
+        self.gatwick = SafetyReport.objects.create(
+            author=self.user,
+            place='Gatwick',
+            date=date(2025, 1, 16),
+            time=time(9, 0),
+            description='Go-around after a runway incursion'
+        )
+        for text in ['First comment', 'Second comment']:
+            Comment.objects.create(
+                report=self.heathrow, author=self.user, content=text
+            )
+        self.client.login(username='testuser', password='testpass123')
+
+    def export(self, **params):
+        """Return the export response and its body as text"""
+        response = self.client.get(reverse('export_reports'), params)
+        body = b''.join(response.streaming_content).decode()
+        return response, body
+
+    def test_export_requires_login(self):
+        """Test that anonymous users are redirected to log in"""
+        self.client.logout()
+        response = self.client.get(reverse('export_reports'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_csv_has_one_row_per_comment(self):
+        """Test that CSV repeats the report for each of its comments"""
+        response, body = self.export(format='csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('safety-reports.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(
+            [(row['place'], row['comment_content']) for row in rows],
+            [
+                ('Gatwick', ''),
+                ('Heathrow', 'First comment'),
+                ('Heathrow', 'Second comment'),
+            ]
+        )
+        self.assertEqual(rows[1]['author_email'], 'test@example.com')
+
+    def test_ndjson_nests_comments(self):
+        """Test that NDJSON has one object per report with its comments"""
+        response, body = self.export(format='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in body.splitlines() if line]
+        self.assertEqual(
+            [record['place'] for record in records], ['Gatwick', 'Heathrow']
+        )
+        self.assertEqual(
+            [comment['content'] for comment in records[1]['comments']],
+            ['First comment', 'Second comment']
+        )
+
+    def test_export_applies_board_filters(self):
+        """Test that search and status filters narrow the export"""
+        _, body = self.export(format='ndjson', status='closed')
+        self.assertIn('Heathrow', body)
+        self.assertNotIn('Gatwick', body)
+        _, body = self.export(format='ndjson', search='incursion')
+        self.assertIn('Gatwick', body)
+        self.assertNotIn('Heathrow', body)
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_export_reads_in_chunks(self):
+        """Test that reports and comments are fetched a chunk at a time"""
+        response = self.client.get(
+            reverse('export_reports'), {'format': 'ndjson'}
+        )
+        # The reports query is read a chunk at a time, with one comments
+        # query per chunk
+        with self.assertNumQueries(3):
+            b''.join(response.streaming_content)
+
+    def test_unknown_format(self):
+        """Test that an unsupported format is rejected"""
+        response = self.client.get(
+            reverse('export_reports'), {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_export_streams_under_asgi(self):
+        """Test that ASGI gets an async iterator, not a buffered list"""
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        with warnings.catch_warnings():
+            # Django warns when it has to buffer a sync iterator
+            warnings.filterwarnings(
+                'error', message='StreamingHttpResponse must consume'
+            )
+            response = await client.get(
+                reverse('export_reports'), {'format': 'ndjson'}
+            )
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(chunks[0], b'\n')
+        records = [
+            json.loads(line) for line in b''.join(chunks).splitlines()
+            if line
+        ]
+        self.assertEqual(
+            [record['place'] for record in records], ['Gatwick', 'Heathrow']
+        )
+
+
+class ApiViewTest(TestCase):
+    """Test suite for the read-only JSON API"""
+
+    def setUp(self):
+        """Set up test client and reports with comments"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.reports = [
+            SafetyReport.objects.create(
+                author=self.user,
+                place=f'Airport {i}',
+                date=date(2025, 1, 15),
+                time=time(14, 30),
+                description=f'Test description {i}'
+            )
+            for i in range(5)
+        ]
+        self.comment = Comment.objects.create(
+            report=self.reports[0], author=self.user, content='Test comment'
+        )
+
+    def get(self, name, params=None, **kwargs):
+        """GET an API endpoint and return (response, decoded body)"""
+        response = self.client.get(reverse(name, **kwargs), params or {})
+        return response, json.loads(response.content)
+
+    def test_reports_list_all_fields(self):
+        """Test that reports are listed newest first with every field"""
+        response, data = self.get('api_reports')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['place'] for item in data['results']],
+            [f'Airport {i}' for i in range(4, -1, -1)]
+        )
+        last = data['results'][-1]
+        self.assertEqual(last['author'], 'testuser')
+        self.assertEqual(last['comment_count'], 1)
+        self.assertIsNone(last['image'])
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fieldsets(self):
+        """Test that ?fields= returns only the requested fields"""
+        _, data = self.get('api_reports', {'fields': 'id,place'})
+        self.assertEqual(set(data['results'][0]), {'id', 'place'})
+
+    def test_sparse_fieldsets_skip_columns(self):
+        """Test that unrequested columns are not read from the database"""
+        with self.assertNumQueries(2) as queries:
+            self.get('api_reports', {'fields': 'place'})
+        self.assertNotIn('description', queries.captured_queries[-1]['sql'])
+
+    def test_unknown_field_is_rejected(self):
+        """Test that a bad field name is a 400"""
+        response, data = self.get('api_reports', {'fields': 'place,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', data['error'])
+
+    def test_cursor_pagination(self):
+        """Test that following next walks every report once"""
+        response, data = self.get('api_reports', {'limit': 2})
+        places = [item['place'] for item in data['results']]
+        while data['next']:
+            data = json.loads(self.client.get(data['next']).content)
+            places += [item['place'] for item in data['results']]
+        self.assertEqual(places, [f'Airport {i}' for i in range(4, -1, -1)])
+
+    def test_since_filters_on_updated_at(self):
+        """Test that ?since= only returns rows changed after it"""
+        since = self.reports[-1].updated_at
+        self.reports[1].description = 'Updated'
+        self.reports[1].save()
+        _, data = self.get(
+            'api_reports', {'since': since.isoformat(), 'fields': 'place'}
+        )
+        self.assertEqual(data['results'], [{'place': 'Airport 1'}])
+
+        response, _ = self.get('api_reports', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_report_detail(self):
+        """Test that a single report is returned or a 404"""
+        response, data = self.get(
+            'api_report', {'fields': 'place'},
+            kwargs={'pk': self.reports[2].pk}
+        )
+        self.assertEqual(data, {'place': 'Airport 2'})
+        response, _ = self.get('api_report', kwargs={'pk': 9999})
+        self.assertEqual(response.status_code, 404)
+
+    def test_comments_for_report(self):
+        """Test that comments can be listed for one report"""
+        _, data = self.get('api_comments', {'report': self.reports[0].pk})
+        self.assertEqual(data['results'][0]['content'], 'Test comment')
+        self.assertEqual(data['results'][0]['report'], self.reports[0].pk)
+        _, data = self.get('api_comments', {'report': self.reports[1].pk})
+        self.assertEqual(data['results'], [])
+
+    def test_conditional_get(self):
+        """Test that an unchanged listing revalidates with a 304"""
+        response = self.client.get(reverse('api_reports'))
+        response = self.client.get(
+            reverse('api_reports'), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class QueryBudgetTest(TestCase):
+    """Test suite for per-view database query budgets"""
+
+    def setUp(self):
+        """Set up test client and reports with comments"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.report = None
+
+    def create_reports(self, count, comments_per_report=2):
+        """Create reports, each with a few comments"""
+        for i in range(count):
+            self.report = SafetyReport.objects.create(
+                author=self.user,
+                place=f'Airport {i}',
+                date=date(2025, 1, 15),
+                time=time(14, 30),
+                description=f'Test description {i}'
+            )
+            for j in range(comments_per_report):
+                Comment.objects.create(
+                    report=self.report,
+                    author=self.user,
+                    content=f'Comment {j}'
+                )
+
+    def test_board_query_count_is_constant(self):
+        """Test that board needs the same queries for 1 or 6 cards"""
+        self.create_reports(1)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('board'))
+        self.create_reports(11)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('board'))
+
+    def test_board_search_query_count(self):
+        """Test that board search stays within its query budget"""
+        self.create_reports(8)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('board'), {'search': 'Airport'})
+
+    def test_board_comment_count_annotation(self):
+        """Test that board cards carry an annotated comment count"""
+        self.create_reports(1, comments_per_report=3)
+        response = self.client.get(reverse('board'))
+        self.assertEqual(response.context['page_obj'][0].comment_count, 3)
+        self.assertContains(response, '3 comments')
+
+    def test_report_detail_query_count_is_constant(self):
+        """Test that report detail does not query per comment"""
+        self.create_reports(1, comments_per_report=5)
+        url = reverse('report_detail', args=[self.report.pk])
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_comments_fragment_query_count(self):
+        """Test that a page of earlier comments joins their authors"""
+        self.create_reports(1, comments_per_report=5)
+        url = reverse('report_comments', args=[self.report.pk])
+        # Versions, report, comments
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['comments']), 2)
+
+    def test_comment_changes_query_count(self):
+        """Test that polling for changes reads only the changed rows"""
+        self.create_reports(1, comments_per_report=5)
+        url = reverse('report_comment_changes', args=[self.report.pk])
+        # Report with its comment count, changed comments, tombstones
+        with self.assertNumQueries(3):
+            self.client.get(url, {'since': timezone.now().isoformat()})
+
+    def test_investigator_report_detail_query_count(self):
+        """Test that the role check reuses the profile loaded with the user"""
+        self.user.profile.role = 'investigator'
+        self.user.profile.save()
+        self.create_reports(1, comments_per_report=5)
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('report_detail', args=[self.report.pk])
+        # Session, user with profile, versions, report, comments
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertContains(response, 'id="statusDropdown"')
+
+    def test_investigations_query_count(self):
+        """Test that investigations stays within its query budget"""
+        self.create_reports(4, comments_per_report=0)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('investigations'))
+
+    def test_investigation_data_query_count(self):
+        """Test that the dashboard data endpoint reads only the counters"""
+        self.create_reports(4, comments_per_report=0)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('get_investigation_data'))
+        self.assertEqual(response.json()['total_reports'], 4)
+
+
+class SessionBackendTest(TestCase):
+    """Test suite for the configurable session backends"""
+
+    def setUp(self):
+        """Set up a user and a report"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.report = SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test safety incident description'
+        )
+
+    def session_queries(self, method, url, data=None):
+        """Make a logged-in request, returning it and its session queries"""
+        client = Client()
+        client.login(username='testuser', password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data)
+        return response, [
+            query['sql'] for query in queries.captured_queries
+            if 'django_session' in query['sql']
+        ]
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookies_skip_the_session_table(self):
+        """Test that signed-cookie sessions authenticate without queries"""
+        response, queries = self.session_queries('get', reverse('board'))
+        self.assertContains(response, 'test@example.com')
+        self.assertEqual(queries, [])
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db'
+    )
+    def test_cached_db_reads_from_the_cache(self):
+        """Test that cached_db sessions are read from the cache"""
+        response, queries = self.session_queries(
+            'get', self.report.get_absolute_url()
+        )
+        self.assertContains(response, 'test@example.com')
+        self.assertEqual(queries, [])
+
+    def test_sessions_from_the_stock_backends_still_resolve(self):
+        """Test that logins from before the profile backends stay valid"""
+        for backend in (
+            'django.contrib.auth.backends.ModelBackend',
+            'allauth.account.auth_backends.AuthenticationBackend',
+        ):
+            client = Client()
+            client.force_login(self.user, backend=backend)
+            response = client.get(reverse('board'))
+            self.assertContains(response, 'test@example.com')
+
+    def test_messages_do_not_write_the_session(self):
+        """Test that a flash message is stored without a session write"""
+        url = self.report.get_absolute_url()
+        response, queries = self.session_queries(
+            'post', url, {'content': 'Test comment'}
+        )
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertIn('messages', response.cookies)
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith('SELECT'))
+
+
+class MetricsTest(TestCase):
+    """Test suite for Server-Timing headers and the /metrics endpoint"""
+
+    def setUp(self):
+        """Set up users and a report, and start from empty metrics"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.staff = User.objects.create_user(
+            username='staff',
+            email='staff@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+        self.report = SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test safety incident description'
+        )
+        clear_caches()
+        metrics.reset_metrics()
+
+    def test_server_timing_header(self):
+        """Test that responses break their time down by kind of work"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('board'))
+        timing = response['Server-Timing']
+        self.assertTrue(timing.startswith('total;dur='))
+        self.assertRegex(
+            timing, rf'db;dur=[\d.]+;desc="count={len(queries)}"'
+        )
+        self.assertIn('template;dur=', timing)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        """Test that SERVER_TIMING=False drops the header"""
+        response = self.client.get(reverse('board'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_metrics_requires_staff_or_token(self):
+        """Test that /metrics is closed to anonymous and regular users"""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.login(username='testuser', password='testpass123')
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.login(username='staff', password='testpass123')
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_with_token(self):
+        """Test that a scraper can read /metrics with the bearer token"""
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    def test_metrics_histograms(self):
+        """Test that requests are aggregated into per-view histograms"""
+        self.client.get(reverse('board'))
+        self.client.get(reverse('board'))
+        self.client.get(self.report.get_absolute_url())
+        self.client.login(username='staff', password='testpass123')
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count'
+            '{view="board",method="GET",status="200"} 2',
+            body
+        )
+        self.assertIn(
+            'http_request_db_queries_bucket{view="report_detail",le="+Inf"} 1',
+            body
+        )
+        self.assertIn('http_request_template_seconds_sum{view="board"}', body)
+        self.assertIn(
+            'cache_lookups_total{kind="fragments",name="board-card",'
+            'result="misses"} 1',
+            body
+        )
+
+    def test_cloudinary_calls_are_timed(self):
+        """Test that uploads to Cloudinary are recorded"""
+        with mock.patch('reports.images.uploader.upload_resource'):
+            images.CloudinaryUploader().upload(io.BytesIO(b'jpeg'))
+        self.assertIn(
+            'cloudinary_call_seconds_count 1',
+            metrics.render_metrics()
+        )
+
+
+class ConditionalGetTest(TestCase):
+    """Test suite for ETag / Last-Modified handling on read views"""
+
+    def setUp(self):
+        """Set up test client and test data"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.report = SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test description'
+        )
+
+    def revalidate(self, url, response, queries):
+        """Request url again with the ETag from an earlier response"""
+        with self.assertNumQueries(queries):
+            return self.client.get(
+                url, headers={'if-none-match': response['ETag']}
+            )
+
+    def test_unchanged_pages_return_304_before_querying(self):
+        """Test that matching ETags skip the view's own queries"""
+        for url in [
+            reverse('board'),
+            reverse('report_detail', args=[self.report.pk]),
+            reverse('investigations'),
+            reverse('get_investigation_data'),
+        ]:
+            response = self.client.get(url)
+            self.assertIn('no-cache', response['Cache-Control'])
+            second = self.revalidate(url, response, 1)
+            self.assertEqual(second.status_code, 304, url)
+
+    def test_investigation_data_if_modified_since(self):
+        """Test that the JSON endpoint honours If-Modified-Since"""
+        url = reverse('get_investigation_data')
+        response = self.client.get(url)
+        second = self.client.get(
+            url, headers={'if-modified-since': response['Last-Modified']}
+        )
+        self.assertEqual(second.status_code, 304)
+
+    def test_new_comment_invalidates_board_and_detail(self):
+        """Test that content changes produce a fresh 200"""
+        board = self.client.get(reverse('board'))
+        detail_url = reverse('report_detail', args=[self.report.pk])
+        detail = self.client.get(detail_url)
+        Comment.objects.create(
+            report=self.report, author=self.user, content='New'
+        )
+        self.assertEqual(self.revalidate(
+            reverse('board'), board, 3).status_code, 200)
+        self.assertEqual(self.revalidate(
+            detail_url, detail, 3).status_code, 200)
+
+    def test_status_change_invalidates_investigation_data(self):
+        """Test that a status change produces a fresh 200"""
+        url = reverse('get_investigation_data')
+        response = self.client.get(url)
+        self.report.investigation_status = 'closed'
+        self.report.save()
+        self.assertEqual(self.revalidate(url, response, 2).status_code, 200)
+
+    def test_etag_differs_per_user(self):
+        """Test that a logged-in user does not get an anonymous 304"""
+        response = self.client.get(reverse('board'))
+        self.client.login(username='testuser', password='testpass123')
+        second = self.client.get(
+            reverse('board'), headers={'if-none-match': response['ETag']}
+        )
+        self.assertEqual(second.status_code, 200)
+
+    def test_etag_changes_with_csrf_secret(self):
+        """Test that a new CSRF secret (as after login) re-renders forms"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('report_detail', args=[self.report.pk])
+        self.client.cookies['csrftoken'] = 'a' * 32
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response, 3).status_code, 304)
+        self.client.cookies['csrftoken'] = 'b' * 32
+        second = self.client.get(
+            url, headers={'if-none-match': response['ETag']}
+        )
+        self.assertEqual(second.status_code, 200)
+
 
 class ReportDetailViewTest(TestCase):
     """Test suite for report_detail view"""
@@ -106,7 +997,7 @@ class ReportDetailViewTest(TestCase):
 
     def test_report_detail_view_contains_report_data(self):
         """Test that report_detail view contains correct report data"""
-        rresponse = self.client.get(
+        response = self.client.get(
             reverse('report_detail', args=[self.report.pk])
         )
         self.assertEqual(response.context['report'], self.report)
@@ -141,6 +1032,158 @@ class ReportDetailViewTest(TestCase):
         self.assertEqual(Comment.objects.count(), 1)
         self.assertEqual(Comment.objects.first().content, 'Test comment')
 
+    def add_comments(self, count):
+        """Create count comments on the report, oldest first"""
+        for i in range(count):
+            Comment.objects.create(
+                report=self.report, author=self.user, content=f'Comment {i}'
+            )
+
+    @override_settings(COMMENTS_PER_PAGE=3)
+    def test_shows_latest_comments_page(self):
+        """Test that only the newest page of comments is rendered"""
+        self.add_comments(5)
+        response = self.client.get(
+            reverse('report_detail', args=[self.report.pk])
+        )
+        self.assertContains(response, 'Comments (5)')
+        self.assertEqual(
+            [comment.content for comment in response.context['comments']],
+            ['Comment 2', 'Comment 3', 'Comment 4']
+        )
+        self.assertContains(response, 'Show earlier comments')
+
+    @override_settings(COMMENTS_PER_PAGE=3)
+    def test_earlier_comments_fragment(self):
+        """Test that the fragment endpoint serves the earlier comments"""
+        self.add_comments(5)
+        page = self.client.get(
+            reverse('report_detail', args=[self.report.pk])
+        ).context['comment_page']
+        response = self.client.get(
+            reverse('report_comments', args=[self.report.pk]),
+            {'after': page.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'reports/includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            [comment.content for comment in response.context['comments']],
+            ['Comment 0', 'Comment 1']
+        )
+        self.assertNotContains(response, 'Show earlier comments')
+
+    @override_settings(COMMENTS_PER_PAGE=3)
+    def test_earlier_comments_without_javascript(self):
+        """Test that report_detail itself can show an earlier page"""
+        self.add_comments(5)
+        url = reverse('report_detail', args=[self.report.pk])
+        latest = self.client.get(url)
+        response = self.client.get(
+            url, {'comments_after': latest.context['comment_page'].next_cursor}
+        )
+        self.assertEqual(len(response.context['comments']), 2)
+        self.assertContains(response, 'Show latest comments')
+        self.assertNotEqual(response['ETag'], latest['ETag'])
+
+    def test_comments_fragment_404_for_invalid_pk(self):
+        """Test that the fragment endpoint 404s for a missing report"""
+        response = self.client.get(reverse('report_comments', args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+    def get_changes(self, **params):
+        """GET the comment changes endpoint, returning its JSON"""
+        response = self.client.get(
+            reverse('report_comment_changes', args=[self.report.pk]), params
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_comment_changes_since(self):
+        """Test that polling returns new, edited and deleted comments"""
+        self.add_comments(3)
+        edited, deleted, unchanged = Comment.objects.order_by('pk')
+        since = timezone.now()
+        edited.content = 'Edited comment'
+        edited.save()
+        deleted_pk = deleted.pk
+        deleted.delete()
+        added = Comment.objects.create(
+            report=self.report, author=self.user, content='New comment'
+        )
+
+        changes = self.get_changes(since=since.isoformat())
+        self.assertFalse(changes['reset'])
+        self.assertEqual(
+            [comment['id'] for comment in changes['comments']],
+            [edited.pk, added.pk]
+        )
+        self.assertIn('Edited comment', changes['comments'][0]['html'])
+        self.assertIn(
+            f'id="comment-{added.pk}"', changes['comments'][1]['html']
+        )
+        self.assertEqual(changes['deleted'], [deleted_pk])
+        self.assertEqual(changes['comment_count'], 3)
+        self.assertNotIn(unchanged.pk, changes['deleted'])
+
+    def test_comment_changes_after_comment(self):
+        """Test that ?after= returns the comments posted after it"""
+        self.add_comments(2)
+        first, second = Comment.objects.order_by('pk')
+        changes = self.get_changes(after=first.pk)
+        self.assertEqual(
+            [comment['id'] for comment in changes['comments']], [second.pk]
+        )
+        # The cursor trails by the overlap, so a recent change repeats
+        repeated = self.get_changes(since=changes['cursor'])
+        self.assertEqual(
+            [comment['id'] for comment in repeated['comments']], [second.pk]
+        )
+
+    @override_settings(COMMENTS_PER_PAGE=2)
+    def test_comment_changes_reset_when_too_many(self):
+        """Test that the page is told to reload after many changes"""
+        since = timezone.now()
+        self.add_comments(3)
+        self.assertEqual(
+            self.get_changes(since=since.isoformat()), {'reset': True}
+        )
+
+    @override_settings(COMMENT_DELETIONS_MAX_AGE=60)
+    def test_comment_changes_reset_when_tombstones_expired(self):
+        """Test that changes older than the tombstones reset the page"""
+        since = timezone.now() - timedelta(minutes=2)
+        self.assertEqual(
+            self.get_changes(since=since.isoformat()), {'reset': True}
+        )
+
+    def test_comment_changes_bad_requests(self):
+        """Test that a missing or invalid cursor is a 400"""
+        url = reverse('report_comment_changes', args=[self.report.pk])
+        for params in ({}, {'since': 'yesterday'}, {'after': 'x'},
+                       {'after': 9999}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+        self.assertEqual(
+            self.client.get(
+                reverse('report_comment_changes', args=[9999]),
+                {'since': timezone.now().isoformat()}
+            ).status_code,
+            404
+        )
+
+    def test_report_detail_polls_latest_comments(self):
+        """Test that the latest comments page carries a poll cursor"""
+        response = self.client.get(
+            reverse('report_detail', args=[self.report.pk])
+        )
+        self.assertContains(
+            response,
+            reverse('report_comment_changes', args=[self.report.pk])
+        )
+        self.assertLess(
+            api.parse_since(response.context['comments_cursor']),
+            timezone.now()
+        )
+
 
 class CreateReportViewTest(TestCase):
     """Test suite for create_report view"""
@@ -184,6 +1227,200 @@ class CreateReportViewTest(TestCase):
         self.assertEqual(SafetyReport.objects.first().place, 'Test Airport')
 
 
+class CreateReportImageUploadTest(TestCase):
+    """Test suite for background image uploads on report creation"""
+
+    def setUp(self):
+        """Use temporary spool and media directories and the fake uploader"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.spool = os.path.join(directory, 'spool')
+        settings = override_settings(
+            IMAGE_UPLOADER='local',
+            IMAGE_UPLOAD_WORKERS=0,
+            IMAGE_SPOOL_ROOT=self.spool,
+            MEDIA_ROOT=os.path.join(directory, 'media')
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def post_report(self):
+        """Submit a report with an image attached"""
+        return self.client.post(reverse('create_report'), {
+            'place': 'Test Airport',
+            'date': '2025-01-15',
+            'time': '14:30',
+            'description': 'Test safety incident description',
+            'image': SimpleUploadedFile(
+                'runway.jpg', b'not really a jpeg', content_type='image/jpeg'
+            ),
+        })
+
+    def test_upload_happens_after_the_response(self):
+        """Test that the request only spools the image"""
+        with mock.patch('reports.images.LocalUploader.upload') as upload:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.post_report()
+            upload.assert_not_called()
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(callbacks)
+
+        report = SafetyReport.objects.get()
+        self.assertFalse(report.image)
+        self.assertTrue(report.image_pending)
+        self.assertEqual(os.listdir(self.spool), ['runway.jpg'])
+        response = self.client.get(report.get_absolute_url())
+        self.assertContains(response, 'Image processing')
+
+    def test_image_attached_once_uploaded(self):
+        """Test that the worker attaches the image and clears the spool"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_report()
+        report = SafetyReport.objects.get()
+        self.assertFalse(report.image_pending)
+        self.assertEqual(report.image.public_id, 'local/runway')
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_failed_upload_is_retried(self):
+        """Test that a failed upload keeps the file for the retry command"""
+        with mock.patch(
+            'reports.images.LocalUploader.upload',
+            side_effect=ConnectionError('upstream down')
+        ):
+            with self.assertLogs('reports.images', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.post_report()
+        report = SafetyReport.objects.get()
+        self.assertTrue(report.image_pending)
+
+        call_command(
+            'process_pending_images', '--min-age', '0',
+            stdout=io.StringIO()
+        )
+        report.refresh_from_db()
+        self.assertFalse(report.image_pending)
+        self.assertEqual(report.image.public_id, 'local/runway')
+
+    def test_missing_spool_file_is_kept_pending(self):
+        """Test that a retry elsewhere than the spool drops nothing"""
+        with self.captureOnCommitCallbacks():
+            self.post_report()
+        report = SafetyReport.objects.get()
+        os.remove(os.path.join(self.spool, 'runway.jpg'))
+
+        with self.assertLogs('reports.images', 'ERROR'):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'process_pending_images', '--min-age', '0',
+                    stdout=io.StringIO(), stderr=io.StringIO()
+                )
+        report.refresh_from_db()
+        self.assertTrue(report.image_pending)
+
+    def test_missing_spool_file_is_dropped_on_request(self):
+        """Test that --drop-missing stops a lost image showing as pending"""
+        with self.captureOnCommitCallbacks():
+            self.post_report()
+        report = SafetyReport.objects.get()
+        os.remove(os.path.join(self.spool, 'runway.jpg'))
+
+        with self.assertLogs('reports.images', 'ERROR'):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'process_pending_images', '--min-age', '0',
+                    '--drop-missing',
+                    stdout=io.StringIO(), stderr=io.StringIO()
+                )
+        report.refresh_from_db()
+        self.assertFalse(report.image_pending)
+        self.assertFalse(report.image)
+        response = self.client.get(report.get_absolute_url())
+        self.assertNotContains(response, 'Image processing')
+
+
+class ResponsiveImageTest(TestCase):
+    """Test suite for report image derivatives and their markup"""
+
+    def setUp(self):
+        """Create a report with an uploaded image"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='testuser', password='testpass123')
+        cloud = mock.patch.object(
+            cloudinary.config(), 'cloud_name', 'test-cloud', create=True
+        )
+        cloud.start()
+        self.addCleanup(cloud.stop)
+        images._responsive_image.cache_clear()
+        self.report = SafetyReport.objects.create(
+            author=self.user,
+            place='Test Airport',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test safety incident description',
+            image='image/upload/v3/reports/runway.jpg'
+        )
+
+    def test_detail_renders_derivatives(self):
+        """Test that the detail page never embeds the original upload"""
+        response = self.client.get(self.report.get_absolute_url())
+        self.assertContains(response, '<source type="image/webp"')
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(
+            response, 'c_limit,q_auto,w_800/v3/reports/runway.jpg 800w'
+        )
+        self.assertContains(
+            response, 'c_limit,q_auto,w_1600/v3/reports/runway.webp 1600w'
+        )
+        self.assertNotContains(response, '/upload/v3/reports/runway.jpg"')
+
+    def test_board_renders_thumbnails(self):
+        """Test that board cards show only the thumbnail derivative"""
+        response = self.client.get(reverse('board'))
+        self.assertContains(
+            response,
+            'c_fill,g_auto,h_180,q_auto,w_320/v3/reports/runway.webp 320w'
+        )
+        self.assertNotContains(response, 'w_800')
+
+    def test_markup_built_once_per_image(self):
+        """Test that derivative URLs are not rebuilt on every render"""
+        with mock.patch(
+            'reports.images.derivative_url', wraps=images.derivative_url
+        ) as build:
+            self.client.get(self.report.get_absolute_url())
+            built = build.call_count
+            self.client.get(self.report.get_absolute_url())
+        self.assertTrue(built)
+        self.assertEqual(build.call_count, built)
+
+    def test_upload_requests_eager_derivatives(self):
+        """Test that Cloudinary builds every derivative at upload time"""
+        with mock.patch(
+            'reports.images.uploader.upload_resource'
+        ) as upload_resource:
+            images.CloudinaryUploader().upload(io.BytesIO(b'jpeg'))
+        options = upload_resource.call_args.kwargs
+        self.assertTrue(options['eager_async'])
+        self.assertEqual(
+            len(options['eager']), 2 * len(images.DERIVATIVES)
+        )
+        self.assertIn(
+            'webp', [t.get('format') for t in options['eager']]
+        )
+
+
 class InvestigationsViewTest(TestCase):
     """Test suite for investigations view"""
 
@@ -232,6 +1469,217 @@ class InvestigationsViewTest(TestCase):
         self.assertEqual(response.context['total_reports'], 2)
 
 
+@override_settings(
+    INVESTIGATION_STREAM_POLL=0.01,
+    INVESTIGATION_STREAM_MAX_AGE=0.1
+)
+class InvestigationStreamViewTest(TransactionTestCase):
+    """Test suite for the investigations server-sent events stream"""
+
+    # Streams query on a thread of their own, with its own connection,
+    # which only sees committed rows
+
+    def setUp(self):
+        """Set up test data"""
+        clear_caches()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        SafetyReport.objects.create(
+            author=self.user,
+            place='Airport 1',
+            date=date(2025, 1, 15),
+            time=time(14, 30),
+            description='Test 1'
+        )
+
+    async def read_stream(self, **headers):
+        """Open the stream under ASGI and collect it until it closes"""
+        response = await AsyncClient().get(
+            reverse('investigation_stream'), headers=headers
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = [chunk async for chunk in response.streaming_content]
+        return b''.join(chunks).decode()
+
+    def test_sync_worker_gets_no_content(self):
+        """Test that WSGI requests are told to fall back to polling"""
+        response = Client().get(reverse('investigation_stream'))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_stream_sends_current_stats_once(self):
+        """Test that the stream pushes stats on connect, not every tick"""
+        body = await self.read_stream()
+        self.assertTrue(body.startswith('retry: '))
+        self.assertEqual(body.count('event: stats'), 1)
+        self.assertIn('"total_reports": 1', body)
+
+    async def test_stream_skips_version_client_already_has(self):
+        """Test that a reconnect with Last-Event-ID gets no duplicate"""
+        body = await self.read_stream()
+        version = body.split('id: ')[1].split('\n')[0]
+        body = await self.read_stream(last_event_id=version)
+        self.assertNotIn('event: stats', body)
+
+    def test_idle_streams_share_one_connection(self):
+        """Test that open streams hold no connection of their own"""
+        created = []
+
+        def count(sender, connection, **kwargs):
+            created.append(threading.get_ident())
+
+        async def read_streams(count):
+            return await asyncio.gather(
+                *(self.read_stream() for _ in range(count))
+            )
+
+        connection_created.connect(count)
+        self.addCleanup(connection_created.disconnect, count)
+        # Queries made on the requests' thread would show up here
+        with CaptureQueriesContext(connection) as queries:
+            bodies = async_to_sync(read_streams)(5)
+        for body in bodies:
+            self.assertIn('"total_reports": 1', body)
+        self.assertEqual(len(queries), 0)
+        self.assertLessEqual(len(created), 1)
+
+
+def reload_urlconf():
+    """Re-import the URLconf so it follows the ASYNC_VIEWS setting"""
+    from aviation_safety import urls as project_urls
+    from . import urls as reports_urls
+    importlib.reload(reports_urls)
+    importlib.reload(project_urls)
+    clear_url_caches()
+
+
+@override_settings(ASYNC_VIEWS=True)
+class AsyncViewsTest(TestCase):
+    """Test suite for the async board, report detail and data views"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Route the async views for this class only"""
+        # Registered first so it runs after the settings override is undone
+        cls.addClassCleanup(reload_urlconf)
+        super().setUpClass()
+        reload_urlconf()
+
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.user.profile.role = 'investigator'
+        self.user.profile.save()
+        self.reports = [
+            SafetyReport.objects.create(
+                author=self.user,
+                place=f'Airport {i}',
+                date=date(2025, 1, 15),
+                time=time(14, 30),
+                description=f'Test description {i}'
+            )
+            for i in range(8)
+        ]
+        Comment.objects.create(
+            report=self.reports[0], author=self.user, content='Test comment'
+        )
+        clear_caches()
+
+    def test_async_views_are_routed(self):
+        """Test that ASYNC_VIEWS swaps in the async variants"""
+        self.assertEqual(resolve('/board/').func.__name__, 'board_async')
+        self.assertEqual(
+            resolve('/report/1/').func.__name__, 'report_detail_async'
+        )
+
+    def test_board(self):
+        """Test that the async board paginates within its query budget"""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('board'), {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertContains(response, 'Page 2 of 2')
+
+    @override_settings(BOARD_PAGINATION='cursor')
+    async def test_board_cursor_pages(self):
+        """Test that cursor pagination works through the async ORM"""
+        response = await self.async_client.get(reverse('board'))
+        page_obj = response.context['page_obj']
+        response = await self.async_client.get(
+            reverse('board'), {'after': page_obj.next_cursor}
+        )
+        self.assertEqual(
+            [report.place for report in response.context['page_obj']],
+            ['Airport 1', 'Airport 0']
+        )
+
+    async def test_report_detail_for_investigator(self):
+        """Test that the detail page renders the user-specific controls"""
+        await self.async_client.alogin(
+            username='testuser', password='testpass123'
+        )
+        response = await self.async_client.get(
+            reverse('report_detail', args=[self.reports[0].pk])
+        )
+        self.assertContains(response, 'Test comment')
+        self.assertContains(response, 'Comments (1)')
+        self.assertContains(response, 'update-status')
+
+    async def test_report_detail_for_legacy_backend_session(self):
+        """Test that a stock-backend session still gets the role controls"""
+        await self.async_client.aforce_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = await self.async_client.get(
+            reverse('report_detail', args=[self.reports[0].pk])
+        )
+        self.assertContains(response, 'update-status')
+
+    def test_report_detail_query_count(self):
+        """Test that the async detail page loads the user only once"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('report_detail', args=[self.reports[0].pk])
+        # Session, user with profile, versions, report, comments
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertContains(response, 'update-status')
+
+    async def test_report_detail_post_comment(self):
+        """Test that comments can be posted through the async view"""
+        await self.async_client.alogin(
+            username='testuser', password='testpass123'
+        )
+        url = reverse('report_detail', args=[self.reports[1].pk])
+        response = await self.async_client.post(url, {'content': 'Async'})
+        self.assertRedirects(response, url, fetch_redirect_response=False)
+        self.assertTrue(
+            await Comment.objects.filter(content='Async').aexists()
+        )
+
+    async def test_report_detail_missing(self):
+        """Test that an unknown report is a 404"""
+        response = await self.async_client.get(
+            reverse('report_detail', args=[9999])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_investigation_data_revalidates(self):
+        """Test that the async data endpoint serves JSON and 304s"""
+        url = reverse('get_investigation_data')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json()['total_reports'], 8)
+        response = await self.async_client.get(
+            url, headers={'if-none-match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+
 class UpdateInvestigationStatusViewTest(TestCase):
     """Test suite for update_investigation_status view"""
 
@@ -289,6 +1737,147 @@ class UpdateInvestigationStatusViewTest(TestCase):
         self.assertEqual(self.report.investigation_status, 'investigating')
 
 
+class UpdateInvestigationStatusBatchViewTest(TestCase):
+    """Test suite for batch status updates and the admin actions"""
+
+    def setUp(self):
+        """Set up an investigator, a staff user and test reports"""
+        self.client = Client()
+        self.investigator_user = User.objects.create_user(
+            username='investigator',
+            email='investigator@example.com',
+            password='testpass123'
+        )
+        self.investigator_user.profile.role = 'investigator'
+        self.investigator_user.profile.save()
+        self.reports = [
+            SafetyReport.objects.create(
+                author=self.investigator_user,
+                place=f'Airport {i}',
+                date=date(2025, 1, 15),
+                time=time(14, 30),
+                description='Test description'
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('update_investigation_status_batch')
+
+    def test_batch_requires_investigator_role(self):
+        """Test that only investigators can update in batch"""
+        User.objects.create_user(
+            username='regularuser', password='testpass123'
+        )
+        self.client.login(username='regularuser', password='testpass123')
+        response = self.client.post(
+            self.url, {'status': 'closed', 'ids': self.reports[0].pk}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_batch_update_reports_per_id(self):
+        """Test that each id gets its own result in one UPDATE"""
+        self.client.login(username='investigator', password='testpass123')
+        ids = f'{self.reports[0].pk},{self.reports[1].pk},9999'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                self.url, {'status': 'investigating', 'ids': ids}
+            )
+        data = response.json()
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "reports_safetyreport"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(data['updated'], 2)
+        self.assertEqual(data['results'], {
+            str(self.reports[0].pk): 'updated',
+            str(self.reports[1].pk): 'updated',
+            '9999': 'not_found',
+        })
+        self.assertEqual(
+            SafetyReport.objects.filter(
+                investigation_status='investigating'
+            ).count(),
+            2
+        )
+
+    def test_batch_update_rejects_bad_input(self):
+        """Test that bad statuses and ids are a 400"""
+        self.client.login(username='investigator', password='testpass123')
+        for data in [
+            {'status': 'lost', 'ids': self.reports[0].pk},
+            {'status': 'closed', 'ids': 'abc'},
+            {'status': 'closed'},
+        ]:
+            response = self.client.post(self.url, data)
+            self.assertEqual(response.status_code, 400)
+
+    def test_admin_action_sets_status(self):
+        """Test that the admin action moves the selected reports"""
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='admin', password='testpass123')
+        response = self.client.post(
+            reverse('admin:reports_safetyreport_changelist'),
+            {
+                'action': 'set_status_dismissed',
+                '_selected_action': [self.reports[2].pk],
+            }
+        )
+        self.assertEqual(response.status_code, 302)
+        self.reports[2].refresh_from_db()
+        self.assertEqual(self.reports[2].investigation_status, 'dismissed')
+
+    @override_settings(STATUS_BATCH_MAX_IDS=2)
+    def test_admin_action_updates_in_batches(self):
+        """Test that the admin action splits large selections in batches"""
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com',
+            password='testpass123'
+        )
+        self.client.login(username='admin', password='testpass123')
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(
+                reverse('admin:reports_safetyreport_changelist'),
+                {
+                    'action': 'set_status_closed',
+                    '_selected_action': [
+                        report.pk for report in self.reports
+                    ],
+                }
+            )
+        updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "reports_safetyreport"')
+        ]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            SafetyReport.objects.filter(investigation_status='closed').count(),
+            3
+        )
+
+    def test_admin_action_requires_change_permission(self):
+        """Test that staff who can only view reports cannot set statuses"""
+        viewer = User.objects.create_user(
+            username='viewer', password='testpass123', is_staff=True
+        )
+        viewer.user_permissions.add(
+            Permission.objects.get(codename='view_safetyreport')
+        )
+        self.client.login(username='viewer', password='testpass123')
+        url = reverse('admin:reports_safetyreport_changelist')
+        self.assertNotContains(
+            self.client.get(url), 'set_status_dismissed'
+        )
+        self.client.post(url, {
+            'action': 'set_status_dismissed',
+            '_selected_action': [self.reports[2].pk],
+        })
+        self.reports[2].refresh_from_db()
+        self.assertEqual(self.reports[2].investigation_status, 'waiting')
+
+
 class EditCommentViewTest(TestCase):
     """Test suite for edit_comment view"""
 
@@ -1,22 +1,56 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Under ASGI the async variants keep slow I/O from holding a thread for
+# the whole request; under WSGI the sync views avoid an event loop per
+# request
+if settings.ASYNC_VIEWS:
+    board_view = views.board_async
+    report_detail_view = views.report_detail_async
+    investigation_data_view = views.get_investigation_data_async
+else:
+    board_view = views.board
+    report_detail_view = views.report_detail
+    investigation_data_view = views.get_investigation_data
+
 urlpatterns = [
     path('', views.about, name='home'),
     path('about/', views.about, name='about'),
-    path('board/', views.board, name='board'),
+    path('board/', board_view, name='board'),
+    path('board/export/', views.export_reports, name='export_reports'),
     path('investigations/', views.investigations, name='investigations'),
     path(
         'investigations/data/',
-        views.get_investigation_data,
+        investigation_data_view,
         name='get_investigation_data'
     ),
-    path('report/<int:pk>/', views.report_detail, name='report_detail'),
+    path(
+        'investigations/stream/',
+        views.investigation_stream,
+        name='investigation_stream'
+    ),
+    path('report/<int:pk>/', report_detail_view, name='report_detail'),
+    path(
+        'report/<int:pk>/comments/',
+        views.report_comments,
+        name='report_comments'
+    ),
+    path(
+        'report/<int:pk>/comments/changes/',
+        views.report_comment_changes,
+        name='report_comment_changes'
+    ),
     path(
         'report/<int:pk>/update-status/',
         views.update_investigation_status,
         name='update_investigation_status'
     ),
+    path(
+        'reports/update-status/',
+        views.update_investigation_status_batch,
+        name='update_investigation_status_batch'
+    ),
     path('create/', views.create_report, name='create_report'),
     path(
         'comment/<int:pk>/edit/',
@@ -28,4 +62,9 @@ urlpatterns = [
         views.delete_comment,
         name='delete_comment'
     ),
+    path('cache/stats/', views.cache_stats, name='cache_stats'),
+    path('metrics', views.metrics, name='metrics'),
+    path('api/reports/', views.api_reports, name='api_reports'),
+    path('api/reports/<int:pk>/', views.api_report, name='api_report'),
+    path('api/comments/', views.api_comments, name='api_comments'),
 ]
@@ -1,42 +1,249 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import (
+    aget_object_or_404,
+    get_object_or_404,
+    redirect,
+    render,
+)
+from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.conf import settings
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.utils.http import urlencode
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from . import api
+from .cache import acached, cached, cache_stats as get_cache_stats
+from .conditional import (
+    api_etag,
+    async_condition,
+    board_etag,
+    investigations_etag,
+    report_detail_etag,
+    status_etag,
+    status_last_modified,
+    status_version,
+)
+from .export import FORMATS, astream, render_export
 from .forms import SafetyReportForm, CommentForm
-from .models import SafetyReport, Comment
+from .images import schedule_upload, spool_image
+from .metrics import render_metrics
+from .models import (
+    SafetyReport,
+    Comment,
+    CommentDeletion,
+    InvestigationStatusCount,
+    UserProfile,
+    comment_count,
+)
+from .pagination import KeysetPaginator, aget_page
+from .search import filter_reports
+from .stream import status_events
+
+# How far the comment changes cursor trails the time of each poll
+COMMENT_CHANGES_OVERLAP = timedelta(seconds=5)
+
+
+async def load_user(request):
+    """
+    Resolve request.user ahead of rendering in an async view.
+
+    Templates read the user (and the investigator role) lazily, which
+    would query the database synchronously inside the event loop, and
+    the template engine takes the failed lookup for a missing value. The
+    profile backends load the profile along with the user; sessions
+    from the stock backends do not, so it is fetched here for them.
+    """
+    user = await request.auser()
+    if user.is_authenticated and not User.profile.is_cached(user):
+        try:
+            user.profile = await UserProfile.objects.aget(user=user)
+        except UserProfile.DoesNotExist:
+            pass
+    request.user = user
+    return user
 
 
 def about(request):
     return render(request, 'reports/about.html')
 
 
-def board(request):
-    reports = SafetyReport.objects.all()
-
-    search_query = request.GET.get('search')
-    if search_query:
-        reports = reports.filter(
-            Q(place__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+def board_reports(request):
+    """The board's reports with the search and status filters applied"""
+    # Join the author and count comments up front so each card renders
+    # without extra queries (see comment_count for why not Count()).
+    # The PostgreSQL tsvector is only read by the search filter itself
+    reports = SafetyReport.objects.select_related('author').defer(
+        'search_vector'
+    ).annotate(
+        comment_count=comment_count()
+    ).order_by('-created_at')
+    return filter_reports(
+        reports, request.GET.get('search'), request.GET.get('status')
+    )
 
-    paginator = Paginator(reports, 6)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
 
-    context = {
+def board_context(request, page_obj):
+    search_query = request.GET.get('search')
+    status_filter = request.GET.get('status')
+    return {
         'page_obj': page_obj,
         'search_query': search_query,
+        'status_filter': status_filter,
+        'status_choices': SafetyReport.INVESTIGATION_STATUS_CHOICES,
+        # Carried over to pagination and export links
+        'filter_query': urlencode({
+            key: value for key, value in (
+                ('search', search_query), ('status', status_filter)
+            ) if value
+        }),
     }
+
+
+def board_uses_cursor(request):
+    """
+    Whether the board is paged by cursor rather than page number.
+
+    Search results are ordered by relevance, which a (created_at, id)
+    cursor cannot resume, so they are always paged by number.
+    """
+    return (
+        settings.BOARD_PAGINATION == 'cursor'
+        and not request.GET.get('search')
+    )
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=board_etag)
+def board(request):
+    reports = board_reports(request)
+    if board_uses_cursor(request):
+        paginator = KeysetPaginator(
+            reports, 6, with_total=settings.BOARD_APPROXIMATE_TOTAL
+        )
+        page_obj = paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
+    else:
+        paginator = Paginator(reports, 6)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+
+    context = board_context(request, page_obj)
+    return render(request, 'reports/board.html', context)
+
+
+@cache_control(private=True, no_cache=True)
+@async_condition(etag_func=board_etag)
+async def board_async(request):
+    """board() for ASGI workers, querying through the async ORM"""
+    reports = board_reports(request)
+    if board_uses_cursor(request):
+        paginator = KeysetPaginator(
+            reports, 6, with_total=settings.BOARD_APPROXIMATE_TOTAL
+        )
+        page_obj = await paginator.aget_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
+    else:
+        page_obj = await aget_page(
+            Paginator(reports, 6), request.GET.get('page')
+        )
+
+    await load_user(request)
+    context = board_context(request, page_obj)
     return render(request, 'reports/board.html', context)
 
 
+@login_required
+def export_reports(request):
+    """Stream every report matching the board filters as CSV or NDJSON"""
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in FORMATS:
+        return HttpResponse('Unknown export format', status=400)
+    content_type, extension = FORMATS[file_format]
+
+    content = render_export(
+        file_format,
+        search=request.GET.get('search'),
+        status=request.GET.get('status')
+    )
+    if isinstance(request, ASGIRequest):
+        content = astream(content)
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = (
+        f'attachment; filename="safety-reports.{extension}"'
+    )
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def comment_paginator(report_pk):
+    """
+    A report's comments newest first, a page at a time.
+
+    Long threads would otherwise render every comment on each visit; the
+    (report, created_at) index serves each page directly.
+    """
+    return KeysetPaginator(
+        Comment.objects.filter(report_id=report_pk).select_related('author'),
+        settings.COMMENTS_PER_PAGE
+    )
+
+
+def comments_cursor(since=None):
+    """
+    since= for the next poll of report_comment_changes.
+
+    It trails the current time by COMMENT_CHANGES_OVERLAP, so a comment
+    saved just before a poll but committed just after it is still
+    picked up by the next one. The page replaces comments it already
+    shows by id, so seeing a change twice is harmless.
+    """
+    cursor = timezone.now() - COMMENT_CHANGES_OVERLAP
+    return cursor if since is None else max(since, cursor)
+
+
+def comments_context(report, comment_page):
+    return {
+        'report': report,
+        'comment_page': comment_page,
+        # Oldest first on the page, as threads read top to bottom
+        'comments': comment_page.object_list[::-1],
+        'comments_cursor': comments_cursor().isoformat(),
+        'comments_poll_seconds': settings.COMMENTS_POLL_SECONDS,
+    }
+
+
+def detail_report(pk):
+    """The report's query, with its comment total for the header"""
+    return SafetyReport.objects.select_related('author').defer(
+        'search_vector'
+    ).annotate(
+        comment_count=comment_count()
+    ).filter(pk=pk)
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=report_detail_etag)
 def report_detail(request, pk):
-    report = get_object_or_404(SafetyReport, pk=pk)
-    comments = report.comments.all()
+    report = get_object_or_404(detail_report(pk))
 
     if request.method == 'POST' and request.user.is_authenticated:
         comment_form = CommentForm(request.POST)
@@ -56,14 +263,138 @@ def report_detail(request, pk):
         else:
             comment_form = None
 
-    context = {
-        'report': report,
-        'comments': comments,
-        'comment_form': comment_form,
-    }
+    comment_page = comment_paginator(pk).get_page(
+        after=request.GET.get('comments_after')
+    )
+    context = comments_context(report, comment_page)
+    context['comment_form'] = comment_form
+    return render(request, 'reports/report_detail.html', context)
+
+
+@cache_control(private=True, no_cache=True)
+@async_condition(etag_func=report_detail_etag)
+async def report_detail_async(request, pk):
+    """report_detail() for ASGI workers, querying through the async ORM"""
+    user = await load_user(request)
+    report = await aget_object_or_404(detail_report(pk))
+
+    if request.method == 'POST' and user.is_authenticated:
+        comment_form = CommentForm(request.POST)
+        if comment_form.is_valid():
+            comment = comment_form.save(commit=False)
+            comment.report = report
+            comment.author = user
+            await comment.asave()
+            messages.success(
+                request,
+                'Your comment has been added successfully!'
+            )
+            return redirect('report_detail', pk=pk)
+    else:
+        if user.is_authenticated:
+            comment_form = CommentForm()
+        else:
+            comment_form = None
+
+    comment_page = await comment_paginator(pk).aget_page(
+        after=request.GET.get('comments_after')
+    )
+    context = comments_context(report, comment_page)
+    context['comment_form'] = comment_form
     return render(request, 'reports/report_detail.html', context)
 
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=report_detail_etag)
+def report_comments(request, pk):
+    """Earlier comments of a report, as a fragment for report_detail"""
+    report = get_object_or_404(SafetyReport.objects.only('pk'), pk=pk)
+    comment_page = comment_paginator(pk).get_page(
+        after=request.GET.get('after')
+    )
+    return render(
+        request, 'reports/includes/comment_list.html',
+        comments_context(report, comment_page)
+    )
+
+
+def comment_changes_since(request, pk):
+    """The time to report changes after, from ?since= or ?after="""
+    if request.GET.get('since'):
+        return api.parse_since(request.GET['since'])
+    if not request.GET.get('after'):
+        raise ValueError("since or after is required")
+    try:
+        after = int(request.GET['after'])
+    except ValueError:
+        raise ValueError("after must be a comment id")
+    # As the page shows it: changes after its last save
+    updated_at = Comment.objects.filter(
+        report_id=pk, pk=after
+    ).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        raise ValueError("after must be a comment of this report")
+    return updated_at
+
+
+@cache_control(private=True, no_cache=True)
+def report_comment_changes(request, pk):
+    """
+    Comments of a report added, edited or deleted after ?since= (or
+    after comment ?after= was last saved), for report_detail to poll.
+
+    Added and edited comments come from one range scan of the
+    (report, updated_at) index, with their rendered HTML; deletions come
+    from their tombstones. When there are too many changes, or
+    tombstones may have been pruned, the page is told to reload instead.
+    """
+    report = get_object_or_404(
+        SafetyReport.objects.annotate(
+            comment_count=comment_count()
+        ).only('pk'),
+        pk=pk
+    )
+    try:
+        since = comment_changes_since(request, pk)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    cursor = comments_cursor(since)
+
+    oldest = timezone.now() - timedelta(
+        seconds=settings.COMMENT_DELETIONS_MAX_AGE
+    )
+    changed = list(
+        Comment.objects.filter(
+            report_id=pk, updated_at__gt=since
+        ).select_related('author').order_by(
+            'updated_at', 'pk'
+        )[:settings.COMMENTS_PER_PAGE + 1]
+    )
+    if since < oldest or len(changed) > settings.COMMENTS_PER_PAGE:
+        return JsonResponse({'reset': True})
+
+    template = get_template('reports/includes/comment.html')
+    return JsonResponse({
+        'reset': False,
+        'comments': [
+            {
+                'id': comment.pk,
+                'created_at': comment.created_at,
+                'updated_at': comment.updated_at,
+                'html': template.render({'comment': comment}, request),
+            }
+            for comment in changed
+        ],
+        'deleted': list(
+            CommentDeletion.objects.filter(
+                report_id=pk, deleted_at__gt=since
+            ).values_list('comment_id', flat=True)
+        ),
+        'comment_count': report.comment_count,
+        'cursor': cursor.isoformat(),
+    })
+
+
 @login_required
 def create_report(request):
     # Check if user just registered (has no reports yet)
@@ -74,7 +405,15 @@ def create_report(request):
         if form.is_valid():
             report = form.save(commit=False)
             report.author = request.user
+            image = form.cleaned_data.get('image')
+            if image:
+                # Spool the file and upload it in the background so the
+                # request does not wait on Cloudinary
+                report.image = None
+                report.pending_image = spool_image(image)
             report.save()
+            if report.pending_image:
+                schedule_upload(report.pk)
             if is_new_user:
                 messages.success(
                     request,
@@ -138,6 +477,51 @@ def update_investigation_status(request, pk):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@login_required
+@require_POST
+def update_investigation_status_batch(request):
+    """Move a list of reports (repeated or comma-separated ids) at once"""
+    profile = getattr(request.user, 'profile', None)
+    if not profile or not profile.is_investigator():
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    new_status = request.POST.get('status')
+    valid_statuses = [
+        choice[0]
+        for choice in SafetyReport.INVESTIGATION_STATUS_CHOICES
+    ]
+    if new_status not in valid_statuses:
+        return JsonResponse({'error': 'Invalid status'}, status=400)
+
+    try:
+        pks = [
+            int(pk)
+            for value in request.POST.getlist('ids')
+            for pk in value.split(',') if pk.strip()
+        ]
+    except ValueError:
+        return JsonResponse({'error': 'Invalid report id'}, status=400)
+    if not pks:
+        return JsonResponse({'error': 'No reports given'}, status=400)
+    if len(pks) > settings.STATUS_BATCH_MAX_IDS:
+        return JsonResponse({
+            'error': (f'At most {settings.STATUS_BATCH_MAX_IDS} reports '
+                      f'per request')
+        }, status=400)
+
+    results = SafetyReport.set_status_bulk(pks, new_status)
+    return JsonResponse({
+        'success': True,
+        'new_status': dict(
+            SafetyReport.INVESTIGATION_STATUS_CHOICES
+        )[new_status],
+        'updated': sum(
+            1 for result in results.values() if result == 'updated'
+        ),
+        'results': {str(pk): result for pk, result in results.items()},
+    })
+
+
 @login_required
 def edit_comment(request, pk):
     comment = get_object_or_404(Comment, pk=pk, author=request.user)
@@ -180,26 +564,9 @@ def delete_comment(request, pk):
     return render(request, 'reports/delete_comment.html', context)
 
 
-def investigations(request):
-    # Get status statistics
-    status_stats = SafetyReport.objects.values(
-        'investigation_status'
-    ).annotate(
-        count=Count('investigation_status')
-    ).order_by('investigation_status')
-
-    # Prepare data for charts
-    status_data = {
-        'waiting': 0,
-        'investigating': 0,
-        'closed': 0,
-        'dismissed': 0,
-    }
-
-    total_reports = SafetyReport.objects.count()
-
-    for stat in status_stats:
-        status_data[stat['investigation_status']] = stat['count']
+def summarize_status(status_data):
+    """Status counts, percentages and total for the investigations pages"""
+    total_reports = sum(status_data.values())
 
     # Calculate percentages
     status_percentages = {}
@@ -207,44 +574,181 @@ def investigations(request):
         percentage = (count / total_reports * 100) if total_reports > 0 else 0
         status_percentages[status] = round(percentage, 1)
 
-    context = {
+    return {
         'status_data': status_data,
         'status_percentages': status_percentages,
         'total_reports': total_reports,
     }
+
+
+def build_status_summary():
+    return summarize_status(InvestigationStatusCount.current())
+
+
+async def abuild_status_summary():
+    return summarize_status(await InvestigationStatusCount.acurrent())
+
+
+def get_status_summary(version):
+    """
+    Cached status summary for a version of the counters.
+
+    ``version`` is the counters' newest updated_at as read from the
+    database (see status_version). The namespace bump alone only reaches
+    this process's cache with the default locmem backend; keying on a
+    version every process reads means a change made by another worker or
+    a management command is never answered with the old summary.
+    """
+    return cached(
+        'investigationstatuscount', f'status-summary:{version}',
+        build_status_summary, name='status-summary'
+    )
+
+
+async def aget_status_summary(version):
+    return await acached(
+        'investigationstatuscount', f'status-summary:{version}',
+        abuild_status_summary, name='status-summary'
+    )
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=investigations_etag)
+def investigations(request):
+    context = get_status_summary(status_version(request))
     return render(request, 'reports/investigations.html', context)
 
 
+@cache_control(no_cache=True)
+@condition(etag_func=status_etag, last_modified_func=status_last_modified)
 def get_investigation_data(request):
     """AJAX endpoint to fetch current investigation status data"""
-    # Get status statistics
-    status_stats = SafetyReport.objects.values(
-        'investigation_status'
-    ).annotate(
-        count=Count('investigation_status')
-    ).order_by('investigation_status')
-
-    # Prepare data for charts
-    status_data = {
-        'waiting': 0,
-        'investigating': 0,
-        'closed': 0,
-        'dismissed': 0,
-    }
+    return JsonResponse(get_status_summary(status_version(request)))
+
+
+@cache_control(no_cache=True)
+@async_condition(
+    etag_func=status_etag, last_modified_func=status_last_modified
+)
+async def get_investigation_data_async(request):
+    """get_investigation_data() for ASGI workers"""
+    # status_last_modified was read by async_condition, so this does
+    # not query
+    version = await sync_to_async(status_version)(request)
+    return JsonResponse(await aget_status_summary(version))
+
+
+async def investigation_stream(request):
+    """Server-sent events endpoint pushing status data when it changes"""
+    if not isinstance(request, ASGIRequest):
+        # A sync worker would be pinned by an endless response; 204 tells
+        # EventSource to stop reconnecting so the page polls instead
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(
+        status_events(
+            get_status_summary,
+            request.headers.get('Last-Event-ID')
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@staff_member_required
+def cache_stats(request):
+    """Cache hit/miss counters for this worker process"""
+    return JsonResponse(get_cache_stats())
+
+
+def metrics(request):
+    """Request and cache metrics of this worker, for Prometheus"""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    if not (
+        token and constant_time_compare(authorization, f'Bearer {token}')
+    ) and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def api_list(request, queryset, available):
+    """Cursor-paginated JSON list of values() rows for the API views"""
+    try:
+        fields = api.parse_fields(request.GET.get('fields'), available)
+        limit = api.parse_limit(
+            request.GET.get('limit'), settings.API_PAGE_SIZE
+        )
+        if request.GET.get('since'):
+            queryset = queryset.filter(
+                updated_at__gt=api.parse_since(request.GET['since'])
+            )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    page = KeysetPaginator(
+        api.select_fields(queryset, fields, available), limit
+    ).get_page(after=request.GET.get('after'))
+
+    next_url = None
+    if page.next_cursor:
+        params = request.GET.copy()
+        params['after'] = page.next_cursor
+        next_url = request.build_absolute_uri(
+            f"{request.path}?{params.urlencode()}"
+        )
+    return JsonResponse({
+        'results': api.serialize(page, fields, available),
+        'next': next_url,
+    })
 
-    total_reports = SafetyReport.objects.count()
 
-    for stat in status_stats:
-        status_data[stat['investigation_status']] = stat['count']
+@cache_control(no_cache=True)
+@condition(etag_func=api_etag)
+def api_reports(request):
+    """Reports newest first, filtered like the board"""
+    reports = filter_reports(
+        SafetyReport.objects.all(),
+        request.GET.get('search'),
+        request.GET.get('status')
+    )
+    return api_list(request, reports, api.REPORT_FIELDS)
 
-    # Calculate percentages
-    status_percentages = {}
-    for status, count in status_data.items():
-        percentage = (count / total_reports * 100) if total_reports > 0 else 0
-        status_percentages[status] = round(percentage, 1)
 
-    return JsonResponse({
-        'status_data': status_data,
-        'status_percentages': status_percentages,
-        'total_reports': total_reports,
-    })
+@cache_control(no_cache=True)
+@condition(etag_func=api_etag)
+def api_report(request, pk):
+    """A single report"""
+    try:
+        fields = api.parse_fields(
+            request.GET.get('fields'), api.REPORT_FIELDS
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    rows = api.select_fields(
+        SafetyReport.objects.filter(pk=pk), fields, api.REPORT_FIELDS
+    )
+    results = api.serialize(rows, fields, api.REPORT_FIELDS)
+    if not results:
+        return JsonResponse({'error': 'Not found'}, status=404)
+    return JsonResponse(results[0])
+
+
+@cache_control(no_cache=True)
+@condition(etag_func=api_etag)
+def api_comments(request):
+    """Comments newest first, optionally for one report"""
+    comments = Comment.objects.all()
+    if request.GET.get('report'):
+        try:
+            comments = comments.filter(report_id=int(request.GET['report']))
+        except ValueError:
+            return JsonResponse(
+                {'error': 'report must be a number'}, status=400
+            )
+    return api_list(request, comments, api.COMMENT_FIELDS)